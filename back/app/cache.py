@@ -0,0 +1,170 @@
+# app/cache.py
+"""Простые in-process кэши для горячих read-only эндпоинтов."""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # Redis нужен только для общего кэша нескольких воркеров
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """LRU-кэш с ограниченным числом ключей и временем жизни записей.
+
+    Потокобезопасен: sync-эндпоинты FastAPI выполняются в пуле потоков.
+    Кэш живёт в памяти процесса, у каждого воркера uvicorn он свой.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class VersionStore:
+    """Номера версий наборов данных для инвалидации кэшей.
+
+    Запись в набор (например, create_category) увеличивает его версию, а
+    закэшированные данные с устаревшей версией перечитываются. Без Redis
+    версии живут в памяти процесса; с CACHE_REDIS_URL они общие для всех
+    воркеров, и запись в одном процессе инвалидирует кэш во всех остальных.
+
+    Если Redis не ответил, следующие retry_after секунд версии читаются
+    локально, без обращения к Redis: иначе во время сбоя каждый запрос
+    ждал бы socket_timeout и писал в лог своё предупреждение.
+    """
+
+    def __init__(self, redis_url: str | None = None, prefix: str = "2ndwear:version:", retry_after: float = 5.0):
+        self.prefix = prefix
+        self.retry_after = retry_after
+        self._retry_at = 0.0  # до этого момента (time.monotonic) Redis не опрашивается
+        self._redis_down = False
+        # Случайная метка запуска: версии разных процессов/перезапусков не совпадут
+        self._boot = uuid.uuid4().hex[:8]
+        self._local: dict[str, int] = {}
+        self._redis = None
+        if redis_url:
+            if aioredis is None:
+                logger.warning("CACHE_REDIS_URL is set but redis package is not installed; using local cache versions")
+            else:
+                self._redis = aioredis.from_url(redis_url, socket_timeout=0.5)
+
+    async def get(self, name: str) -> str:
+        if self._redis is not None and time.monotonic() >= self._retry_at:
+            try:
+                key = self.prefix + name
+                value = await self._redis.get(key)
+                if value is None:
+                    # Случайное начальное значение защищает от совпадения версий после очистки Redis
+                    await self._redis.set(key, random.randint(1, 2**31), nx=True)
+                    value = await self._redis.get(key)
+                self._redis_ok()
+                return f"r:{int(value)}"
+            except aioredis.RedisError as e:
+                self._redis_failed(e)
+        return f"{self._boot}:{self._local.get(name, 0)}"
+
+    async def bump(self, name: str) -> None:
+        self._local[name] = self._local.get(name, 0) + 1
+        if self._redis is not None:
+            # Запись пробует Redis и во время сбоя: потерянная инвалидация
+            # хуже лишнего ожидания, а записи редки
+            try:
+                await self._redis.incr(self.prefix + name)
+                self._redis_ok()
+            except aioredis.RedisError as e:
+                logger.warning("Redis unavailable, cache version for %s bumped locally only: %s", name, e)
+                self._redis_failed(e, log=False)
+
+    def _redis_ok(self):
+        if self._redis_down:
+            self._redis_down = False
+            logger.info("Redis is available again, using shared cache versions")
+
+    def _redis_failed(self, error: Exception, log: bool = True):
+        now = time.monotonic()
+        # Одно предупреждение на окно: параллельные запросы, упавшие вместе, молчат
+        if log and now >= self._retry_at:
+            logger.warning(
+                "Redis unavailable, using local cache versions for %g s: %s", self.retry_after, error
+            )
+        self._redis_down = True
+        self._retry_at = now + self.retry_after
+
+
+class VersionedSnapshot:
+    """Read-through кэш одного значения, действительного, пока не сменилась версия набора.
+
+    ttl ограничивает жизнь снимка на случай записей в БД в обход API.
+    """
+
+    def __init__(self, name: str, versions: VersionStore, ttl: float = 300.0):
+        self.name = name
+        self.versions = versions
+        self.ttl = ttl
+        self._value = None
+        self._version = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self, loader):
+        """Вернуть снимок, при необходимости перечитав его через await loader()"""
+        version = await self.versions.get(self.name)
+        if self._is_fresh(version):
+            return self._value
+        async with self._lock:
+            # Пока ждали блокировку, снимок мог обновить другой запрос
+            if self._is_fresh(version):
+                return self._value
+            self._value = await loader()
+            self._version = version
+            self._expires_at = time.monotonic() + self.ttl
+            return self._value
+
+    def invalidate(self):
+        self._version = None
+
+    def _is_fresh(self, version: str) -> bool:
+        return self._version == version and self._expires_at > time.monotonic()
+
+
+versions = VersionStore(
+    os.getenv("CACHE_REDIS_URL"),
+    retry_after=float(os.getenv("CACHE_REDIS_RETRY_AFTER", "5")),
+)
@@ -0,0 +1,194 @@
+# app/compression.py
+"""Сжатие ответов gzip/brotli по Accept-Encoding (ASGI-middleware)."""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # без пакета brotli ответы сжимаются только gzip
+    brotli = None
+
+# Уже сжатые форматы: повторное сжатие тратит CPU и ничего не даёт
+INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """Accept-Encoding → {кодировка: q}, например 'gzip, br;q=0.8' → {'gzip': 1.0, 'br': 0.8}"""
+    encodings = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        encodings[name] = q
+    return encodings
+
+
+class _Compressor:
+    """Потоковый компрессор с единым интерфейсом для gzip и brotli"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits=31: формат gzip (заголовок и CRC), а не «голый» deflate
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Сжимает ответы, если клиент это поддерживает и ответ того стоит.
+
+    - br предпочитается gzip при равном q (если установлен пакет brotli);
+    - ответы меньше minimum_size отдаются как есть: заголовки и CPU дороже экономии;
+    - изображения и другие сжатые форматы, а также пути из exclude_paths
+      (прокси картинок /media/download) не трогаются;
+    - строгий ETag сжатого ответа становится слабым (W/): байты другие,
+      а http_cache.etag_matches сравнивает ETag без учёта W/.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_paths: tuple = (),
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths = tuple(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        encoding = self.choose_encoding(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        await _CompressedResponder(self, encoding)(self.app, scope, receive, send)
+
+    def choose_encoding(self, accept_encoding: str) -> str | None:
+        accepted = parse_accept_encoding(accept_encoding)
+        candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+        best, best_q = None, 0.0
+        for encoding in candidates:
+            q = accepted.get(encoding, accepted.get("*", 0.0))
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+
+class _CompressedResponder:
+    """Один ответ: заголовки придерживаются до первого куска тела, по нему решаем, сжимать ли"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str | None):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.start_message = None
+        self.compressor = None
+
+    async def __call__(self, app, scope, receive, send):
+        self.send = send
+        await app(scope, receive, self.send_wrapper)
+
+    async def send_wrapper(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = _Headers(start["headers"])
+            self.compressor = self.negotiate(start["status"], headers, body, more_body)
+            if self.compressor is not None:
+                body = self.compressor.compress(body, final=not more_body)
+                if more_body:
+                    # Длина сжатого потока заранее неизвестна — chunked
+                    headers.remove("content-length")
+                else:
+                    headers.set("content-length", str(len(body)))
+            start["headers"] = headers.raw
+            await self.send(start)
+        elif self.compressor is not None:
+            body = self.compressor.compress(body, final=not more_body)
+
+        if self.compressor is None:
+            await self.send(message)
+        else:
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    def negotiate(self, status: int, headers: "_Headers", body: bytes, more_body: bool):
+        """Компрессор для ответа или None; правит заголовки сжатого ответа"""
+        content_type = headers.get("content-type", "")
+        if (
+            status in (204, 206, 304)
+            or "content-encoding" in headers
+            or content_type.startswith(INCOMPRESSIBLE_TYPES)
+        ):
+            return None
+        # Представление зависит от Accept-Encoding, даже если этот ответ не сжат
+        headers.append_vary("Accept-Encoding")
+
+        # Для потокового ответа размер известен только из Content-Length
+        size = int(headers.get("content-length") or self.middleware.minimum_size) if more_body else len(body)
+        if self.encoding is None or size < self.middleware.minimum_size:
+            return None
+
+        headers.set("content-encoding", self.encoding)
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers.set("etag", "W/" + etag)
+        return _Compressor(self.encoding, self.middleware.gzip_level, self.middleware.brotli_quality)
+
+
+class _Headers:
+    """Минимальная обёртка над списком ASGI-заголовков [(b"name", b"value")]"""
+
+    def __init__(self, raw):
+        self.raw = list(raw)
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str, default=None):
+        key = name.encode("latin-1")
+        for header, value in self.raw:
+            if header.lower() == key:
+                return value.decode("latin-1")
+        return default
+
+    def set(self, name: str, value: str):
+        self.remove(name)
+        self.raw.append((name.encode("latin-1"), value.encode("latin-1")))
+
+    def remove(self, name: str):
+        key = name.encode("latin-1")
+        self.raw = [(h, v) for h, v in self.raw if h.lower() != key]
+
+    def append_vary(self, value: str):
+        vary = self.get("vary")
+        if not vary:
+            self.set("vary", value)
+        elif value.lower() not in (v.strip().lower() for v in vary.split(",")):
+            self.set("vary", f"{vary}, {value}")
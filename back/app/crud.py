@@ -1,73 +1,301 @@
 # app/crud.py
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, select, text, union_all, literal, or_, tuple_, func, cast, true, false, Numeric, String
+from sqlalchemy.dialects import postgresql, sqlite
 from . import models, schemas
+from .cache import VersionedSnapshot, versions
+from .http_cache import make_etag
+from .pagination import encode_cursor, decode_cursor
 
+# Порядок выдачи каталога: новые сверху, id разрешает совпадения created_at
+PRODUCT_ORDER = "newest"
+# Порядок выдачи поиска: сначала самые релевантные, затем как в каталоге
+RELEVANCE_ORDER = "relevance"
 
-def create_user(db: Session, data: schemas.UserCreate):
+# Сортировки каталога (параметр sort): ключи keyset-пагинации и направление
+# (True — по убыванию). У каждой есть индекс с теми же колонками, см. models.Product
+PRODUCT_SORTS = {
+    PRODUCT_ORDER: ((models.Product.created_at, models.Product.id), True),
+    "price_asc": ((models.Product.price, models.Product.id), False),
+    "price_desc": ((models.Product.price, models.Product.id), True),
+}
+
+# Поля, по которым считаются фасеты для фильтров каталога
+FACET_FIELDS = ("size", "color", "style", "gender", "condition", "section", "category_id")
+
+# Категории меняются редко: весь справочник кэшируется в памяти процесса
+# и перечитывается после create_category (в любом воркере, если задан CACHE_REDIS_URL)
+CATEGORY_CACHE_TTL = float(os.getenv("CATEGORY_CACHE_TTL", "300"))
+_categories = VersionedSnapshot("categories", versions, ttl=CATEGORY_CACHE_TTL)
+
+# До скольких товаров X-Total-Count считается точно; больше — оценка планировщика PostgreSQL
+PRODUCT_COUNT_EXACT_LIMIT = int(os.getenv("PRODUCT_COUNT_EXACT_LIMIT", "1000"))
+
+# Режим поиска: auto — полнотекстовый на PostgreSQL и ILIKE на остальных БД,
+# fts — всегда полнотекстовый, ilike — всегда ILIKE (например, до миграции)
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "auto")
+
+
+async def create_user(db: AsyncSession, data: schemas.UserCreate):
     user = models.User(username=data.username, telegram_id=data.telegram_id)
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     return user
 
 
-def get_or_create_user(db: Session, telegram_id: str, username: str | None = None, contact: str | None = None):
-    user = db.query(models.User).filter(models.User.telegram_id == telegram_id).first()
-    if user:
-        updated = False
-        if username and user.username != username:
-            user.username = username
-            updated = True
-        if contact and user.contact != contact:
-            user.contact = contact
-            updated = True
-        if updated:
-            db.commit()
-            db.refresh(user)
-        return user
-
-    user = models.User(username=username, telegram_id=telegram_id, contact=contact)
+async def get_user_by_telegram_id(db: AsyncSession, telegram_id: str):
+    result = await db.execute(select(models.User).where(models.User.telegram_id == telegram_id))
+    return result.scalars().first()
+
+
+async def get_or_create_user(db: AsyncSession, telegram_id: str, username: str | None = None, contact: str | None = None):
+    """Найти пользователя Telegram или создать его одним upsert-запросом.
+
+    Пустые username/contact не затирают сохранённые значения.
+    """
+    username = username or None
+    contact = contact or None
     try:
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-        return user
-    except Exception:
-        db.rollback()
-        return db.query(models.User).filter(models.User.telegram_id == telegram_id).first()
+        user, updated = await _upsert_telegram_user(db, telegram_id, username, contact)
+    except IntegrityError:
+        # username уже занят другим аккаунтом (в Telegram ники переходят
+        # между людьми) — синхронизируем остальное, ник оставляем прежним
+        await db.rollback()
+        user, updated = await _upsert_telegram_user(db, telegram_id, None, contact)
+    await db.commit()
+    if updated:
+        # username/contact продавца входят в выдачу каталога. Только что
+        # созданного пользователя в выдаче ещё нет — кэши не сбрасываем
+        await versions.bump("products")
+    return user
+
+
+async def _upsert_telegram_user(db: AsyncSession, telegram_id: str, username: str | None, contact: str | None):
+    """INSERT ... ON CONFLICT (telegram_id) DO UPDATE ... RETURNING.
+
+    Строка переписывается, только если username/contact действительно
+    поменялись: бот шлёт одно и то же на каждое обновление, и лишние UPDATE
+    плодили бы версии строк и WAL. Возвращает (пользователь, обновлена ли
+    существующая строка); для нового пользователя — False.
+    """
+    users = models.User.__table__
+    new_id = models.generate_uuid()
+    stmt = _dialect_insert(db)(users).values(
+        id=new_id, telegram_id=telegram_id, username=username, contact=contact,
+    )
+    new_username = func.coalesce(stmt.excluded.username, users.c.username)
+    new_contact = func.coalesce(stmt.excluded.contact, users.c.contact)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[users.c.telegram_id],
+        set_={"username": new_username, "contact": new_contact},
+        where=or_(
+            users.c.username.is_distinct_from(new_username),
+            users.c.contact.is_distinct_from(new_contact),
+        ),
+    ).returning(*users.c)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Неизменённую строку читаем тем же запросом (снимок до INSERT)
+        upserted = stmt.cte("upserted")
+        stmt = union_all(
+            select(upserted, true().label("changed")),
+            select(users, false().label("changed")).where(
+                users.c.telegram_id == telegram_id,
+                ~select(upserted.c.id).exists(),
+            ),
+        )
+    row = (await db.execute(stmt)).mappings().first()
+    if row is None:
+        # SQLite: строка не изменилась; PostgreSQL: её только что вставил
+        # параллельный запрос, и в снимке нашего запроса её ещё нет
+        result = await db.execute(select(users).where(users.c.telegram_id == telegram_id))
+        return schemas.User(**result.mappings().one()), False
+    # ON CONFLICT DO UPDATE не меняет id: свой id — значит, строку вставили
+    return schemas.User(**row), row.get("changed", True) and row["id"] != new_id
 
 
-def create_category(db: Session, name: str):
+def _dialect_insert(db: AsyncSession):
+    """insert() с поддержкой ON CONFLICT для текущей БД"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert
+    return sqlite.insert
+
+
+async def create_category(db: AsyncSession, name: str):
     """Создать или получить категорию"""
-    category = db.query(models.Category).filter(models.Category.name == name).first()
+    category = await get_category_by_name(db, name)
     if category:
         return category
     category = models.Category(name=name)
-    db.add(category)
-    db.commit()
-    db.refresh(category)
+    try:
+        db.add(category)
+        await db.commit()
+    except IntegrityError:
+        # Категорию с тем же именем только что создал параллельный запрос
+        await db.rollback()
+        result = await db.execute(select(models.Category).where(models.Category.name == name))
+        category = result.scalars().one()
+    await _categories_changed()
     return category
 
 
-def list_categories(db: Session):
+async def categories_snapshot(db: AsyncSession) -> dict:
+    """Закэшированный справочник категорий: items, by_id, by_name и etag"""
+    return await _categories.get(lambda: _load_categories(db))
+
+
+async def _load_categories(db: AsyncSession) -> dict:
+    result = await db.execute(select(models.Category).order_by(models.Category.id))
+    items = [schemas.Category(id=c.id, name=c.name) for c in result.scalars()]
+    return {
+        "items": items,
+        "by_id": {c.id: c for c in items},
+        "by_name": {c.name: c for c in items},
+        "etag": make_etag(*((c.id, c.name) for c in items)),
+    }
+
+
+async def list_categories(db: AsyncSession):
     """Получить все категории"""
-    return db.query(models.Category).all()
+    return (await categories_snapshot(db))["items"]
+
 
+async def get_category(db: AsyncSession, category_id: int):
+    """Получить категорию по ID"""
+    return (await categories_snapshot(db))["by_id"].get(category_id)
 
-def create_product(db: Session, data: schemas.ProductCreate, seller_id: str):
+
+async def get_category_by_name(db: AsyncSession, name: str):
+    """Получить категорию по названию"""
+    return (await categories_snapshot(db))["by_name"].get(name)
+
+
+async def resolve_category_ids(db: AsyncSession, items: list[schemas.ProductCreate]) -> tuple[list, bool]:
+    """category_id для каждого товара и признак, что в справочник добавлены категории.
+
+    Название из поля category ищется в закэшированном справочнике
+    (categories_snapshot), поэтому известные названия не стоят запросов.
+    Неизвестные вставляются одним INSERT ... ON CONFLICT DO NOTHING и
+    перечитываются одним SELECT в текущей транзакции, без commit: они
+    фиксируются или откатываются вместе с товарами.
+    """
+    names = ["" if item.category_id is not None else (item.category or "").strip() for item in items]
+    if not any(names):
+        return [item.category_id for item in items], False
+
+    by_name = (await categories_snapshot(db))["by_name"]
+    ids = {name: category.id for name, category in by_name.items()}
+    missing = sorted({name for name in names if name and name not in ids})
+    if missing:
+        await db.execute(
+            _dialect_insert(db)(models.Category)
+            .values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=[models.Category.name])
+        )
+        result = await db.execute(
+            select(models.Category.id, models.Category.name).where(models.Category.name.in_(missing))
+        )
+        ids.update({name: category_id for category_id, name in result})
+    category_ids = [
+        item.category_id if item.category_id is not None else ids.get(name)
+        for item, name in zip(items, names)
+    ]
+    return category_ids, bool(missing)
+
+
+async def _categories_changed():
+    _categories.invalidate()
+    await versions.bump("categories")
+
+
+async def create_product(db: AsyncSession, data: schemas.ProductCreate, seller_id: str):
+    (category_id,), new_categories = await resolve_category_ids(db, [data])
     product = models.Product(
-        **data.dict(),
+        **data.dict(exclude={"category", "category_id"}),
+        category_id=category_id,
         seller_id=seller_id
     )
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    if new_categories:
+        await _categories_changed()
+    await versions.bump("products")
     return product
 
 
-def list_products(
-    db: Session,
+# Строк товара на один INSERT: по параметру на каждую колонку
+BULK_INSERT_CHUNK = 32767 // len(models.Product.__table__.columns)
+
+
+async def create_products_bulk(db: AsyncSession, items: list[schemas.ProductCreate], seller_id: str) -> list[str]:
+    """Создать товары одним multi-row INSERT в одной транзакции, вернуть их id по порядку.
+
+    Новые категории из поля category создаются в той же транзакции.
+    """
+    category_ids, new_categories = await resolve_category_ids(db, items)
+    now = datetime.utcnow()
+    rows = [
+        {
+            **item.dict(exclude={"category", "category_id"}),
+            "category_id": category_id,
+            "id": models.generate_uuid(),
+            "seller_id": seller_id,
+            "created_at": now,
+        }
+        for item, category_id in zip(items, category_ids)
+    ]
+    # Один INSERT не может нести больше 32767 параметров (лимит PostgreSQL),
+    # поэтому большой список режется на части — в той же транзакции
+    for start in range(0, len(rows), BULK_INSERT_CHUNK):
+        await db.execute(insert(models.Product).values(rows[start:start + BULK_INSERT_CHUNK]))
+    await db.commit()
+    if new_categories:
+        await _categories_changed()
+    await versions.bump("products")
+    return [row["id"] for row in rows]
+
+
+async def catalog_version() -> str:
+    """Версия каталога: меняется при каждом добавлении товаров"""
+    return await versions.get("products")
+
+
+# Колонки выдачи каталога в порядке полей schemas.Product. Username/contact
+# продавца берутся из users, если их не передали при создании товара
+PRODUCT_LISTING_COLUMNS = {
+    name: getattr(models.Product, name) for name in schemas.Product.__fields__
+}
+PRODUCT_LISTING_COLUMNS.update(
+    seller_username=func.coalesce(func.nullif(models.Product.seller_username, ""), models.User.username),
+    seller_contact=func.coalesce(func.nullif(models.Product.seller_contact, ""), models.User.contact),
+)
+SELLER_FIELDS = ("seller_username", "seller_contact")
+
+
+def _select_product_fields(fields=None, extra=()):
+    """SELECT только запрошенных полей товара (по умолчанию — всех полей schemas.Product).
+
+    Колонки идут в порядке fields, за ними created_at, id и extra, если их
+    не запросили: они нужны для курсора. users
+    присоединяется, только когда нужны поля продавца.
+    """
+    names = tuple(fields or PRODUCT_LISTING_COLUMNS)
+    for name in ("created_at", "id", *extra):
+        if name not in names:
+            names += (name,)
+    q = select(*(PRODUCT_LISTING_COLUMNS[name].label(name) for name in names))
+    if any(name in SELLER_FIELDS for name in names):
+        q = q.outerjoin(models.Product.seller)
+    return q
+
+
+async def list_products(
+    db: AsyncSession,
     search: str = None,
     category_id: int = None,
     section: str = None,
@@ -76,57 +304,338 @@ def list_products(
     style: str = None,
     gender: str = None,
     condition: str = None,
+    min_price: float = None,
+    max_price: float = None,
+    sort: str = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: str = None,
+    fields: tuple = None,
 ):
-    """Получить товары с поддержкой фильтрации и пагинации"""
-    q = db.query(models.Product)
-    
+    """Получить товары с поддержкой фильтрации и пагинации.
+
+    sort — ключ PRODUCT_SORTS (по умолчанию newest). Если передан cursor
+    (см. product_cursor), страница строится по ключу сортировки последнего
+    товара предыдущей страницы, а skip игнорируется. Невалидный курсор или
+    курсор от другой сортировки приводит к ValueError.
+
+    На PostgreSQL поиск полнотекстовый (см. SEARCH_BACKEND): без явного sort
+    результаты упорядочены по релевантности, а у строк есть колонка search_rank.
+
+    Выдача только читается, поэтому вместо ORM-объектов возвращаются строки
+    (Row) с колонками PRODUCT_LISTING_COLUMNS: без identity map и загрузки
+    связей, продавец подтягивается тем же запросом через LEFT JOIN.
+    fields ограничивает набор колонок (см. _select_product_fields).
+    """
+    order = sort or PRODUCT_ORDER
+    keys, descending = PRODUCT_SORTS[order]
+    order_keys = list(keys)
+    q = _select_product_fields(fields, extra=[key.key for key in keys]).select_from(models.Product)
+
     # Фильтр по поисковой строке
     if search:
-        q = q.filter(
-            or_(
-                models.Product.title.ilike(f"%{search}%"),
-                models.Product.description.ilike(f"%{search}%"),
+        q = q.where(_search_condition(db, search))
+        if sort is None and _use_fulltext_search(db):
+            # Ранг округляется до numeric, чтобы его можно было точно сравнить в курсоре
+            rank = func.round(
+                cast(func.ts_rank(models.PRODUCT_SEARCH_VECTOR, _search_tsquery(search)), Numeric), 6
             )
-        )
-    
+            q = q.add_columns(rank.label("search_rank"))
+            order = RELEVANCE_ORDER
+            order_keys.insert(0, rank)
+
     # Фильтры по полям
-    if category_id:
-        q = q.filter(models.Product.category_id == category_id)
-    if section:
-        q = q.filter(models.Product.section == section)
-    if size:
-        q = q.filter(models.Product.size == size)
-    if color:
-        q = q.filter(models.Product.color == color)
-    if style:
-        q = q.filter(models.Product.style == style)
-    if gender:
-        q = q.filter(models.Product.gender == gender)
-    if condition:
-        q = q.filter(models.Product.condition == condition)
-    
+    q = q.where(*_attribute_filters(
+        category_id=category_id,
+        section=section,
+        size=size,
+        color=color,
+        style=style,
+        gender=gender,
+        condition=condition,
+    ).values(), *_price_filters(min_price, max_price))
+
+    # Keyset-пагинация: продолжаем строго после последнего товара прошлой страницы
+    if cursor:
+        values = _decode_product_cursor(cursor, order)
+        row_key = tuple_(*order_keys)
+        cursor_key = tuple_(*values, types=[key.type for key in order_keys])
+        q = q.where(row_key < cursor_key if descending else row_key > cursor_key)
+
     # Сортировка и пагинация
-    return q.order_by(models.Product.created_at.desc()).offset(skip).limit(limit).all()
+    q = q.order_by(*(key.desc() if descending else key.asc() for key in order_keys))
+    if not cursor:
+        q = q.offset(skip)
+    result = await db.execute(q.limit(limit))
+    return result.all()
 
 
-def get_product(db: Session, product_id: str):
-    """Получить товар по ID"""
-    return db.query(models.Product).filter(models.Product.id == product_id).first()
+async def count_products(
+    db: AsyncSession,
+    search: str = None,
+    category_id: int = None,
+    section: str = None,
+    size: str = None,
+    color: str = None,
+    style: str = None,
+    gender: str = None,
+    condition: str = None,
+    min_price: float = None,
+    max_price: float = None,
+) -> tuple[int, bool]:
+    """Число товаров под фильтрами list_products: (количество, точное ли оно).
+
+    Точный COUNT(*) по большой выборке стоит столько же, сколько её чтение,
+    поэтому считается не больше PRODUCT_COUNT_EXACT_LIMIT + 1 строк. Если
+    выборка больше, на PostgreSQL возвращается оценка планировщика:
+    pg_class.reltuples без фильтров или число строк из EXPLAIN с фильтрами.
+    На остальных БД считается точно.
+    """
+    conditions = list(_attribute_filters(
+        category_id=category_id,
+        section=section,
+        size=size,
+        color=color,
+        style=style,
+        gender=gender,
+        condition=condition,
+    ).values())
+    if search:
+        conditions.append(_search_condition(db, search))
+    conditions += _price_filters(min_price, max_price)
+    matching = select(literal(1)).select_from(models.Product).where(*conditions)
+
+    if db.get_bind().dialect.name != "postgresql":
+        return await db.scalar(select(func.count()).select_from(matching.subquery())), True
+
+    bounded = matching.limit(PRODUCT_COUNT_EXACT_LIMIT + 1).subquery()
+    count = await db.scalar(select(func.count()).select_from(bounded))
+    if count <= PRODUCT_COUNT_EXACT_LIMIT:
+        return count, True
+
+    estimate = -1
+    if not conditions:
+        estimate = await db.scalar(
+            text("SELECT reltuples FROM pg_class WHERE oid = CAST(:name AS regclass)"),
+            {"name": models.Product.__tablename__},
+        )
+    if estimate is None or estimate < 0:
+        # reltuples = -1, пока таблицу ни разу не анализировали; тогда спрашиваем план
+        estimate = await _planner_rows(db, matching)
+    # Оценка не может быть меньше уже посчитанного точно
+    return max(int(estimate), count), False
+
+
+async def _planner_rows(db: AsyncSession, statement) -> int:
+    """Оценка числа строк запроса из EXPLAIN (без выполнения самого запроса)"""
+    conn = await db.connection()
+    # EXPLAIN выполняется тем же драйвером: у asyncpg параметры позиционные ($1, $2...)
+    compiled = statement.compile(dialect=conn.dialect)
+    parameters = compiled.construct_params()
+    if compiled.positiontup:
+        parameters = tuple(parameters[name] for name in compiled.positiontup)
+    raw = (await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", parameters)).scalar()
+    plan = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+    return int(plan["Plan Rows"])
+
+
+async def product_facets(
+    db: AsyncSession,
+    search: str = None,
+    category_id: int = None,
+    section: str = None,
+    size: str = None,
+    color: str = None,
+    style: str = None,
+    gender: str = None,
+    condition: str = None,
+    min_price: float = None,
+    max_price: float = None,
+) -> dict:
+    """Количество товаров по значениям каждого фильтра (одним запросом).
+
+    Для каждого поля применяются все фильтры, кроме фильтра по самому полю:
+    так при выбранном size=M видно, сколько товаров будет и в других размерах.
+    """
+    filters = _attribute_filters(
+        category_id=category_id,
+        section=section,
+        size=size,
+        color=color,
+        style=style,
+        gender=gender,
+        condition=condition,
+    )
+    common = [_search_condition(db, search)] if search else []
+    common += _price_filters(min_price, max_price)
+
+    branches = []
+    for field in FACET_FIELDS:
+        column = getattr(models.Product, field)
+        conditions = common + [c for name, c in filters.items() if name != field]
+        branches.append(
+            select(
+                literal(field).label("facet"),
+                cast(column, String).label("value"),
+                func.count().label("count"),
+            )
+            .where(column.isnot(None), *conditions)
+            .group_by(column)
+        )
+
+    facets = {field: [] for field in FACET_FIELDS}
+    result = await db.execute(union_all(*branches))
+    for row in result:
+        facets[row.facet].append({"value": row.value, "count": row.count})
+    for values in facets.values():
+        values.sort(key=lambda item: (-item["count"], item["value"]))
+    return facets
+
+
+def _attribute_filters(**filters) -> dict:
+    """Условия равенства по заполненным фильтрам, ключ — имя поля Product"""
+    return {
+        name: getattr(models.Product, name) == value
+        for name, value in filters.items()
+        if value
+    }
+
+
+def _price_filters(min_price: float = None, max_price: float = None) -> list:
+    """Условия диапазона цены (границы включительно)"""
+    conditions = []
+    if min_price is not None:
+        conditions.append(models.Product.price >= min_price)
+    if max_price is not None:
+        conditions.append(models.Product.price <= max_price)
+    return conditions
 
 
-def create_message(db: Session, data: schemas.MessageCreate):
+def _search_condition(db: AsyncSession, search: str):
+    if _use_fulltext_search(db):
+        return models.PRODUCT_SEARCH_VECTOR.op("@@")(_search_tsquery(search))
+    return or_(
+        models.Product.title.ilike(f"%{search}%"),
+        models.Product.description.ilike(f"%{search}%"),
+    )
+
+
+def search_cache_key(db: AsyncSession, search: str | None) -> str | None:
+    """search для ключа кэша: запросы с одинаковым ключом должны находить одно и то же.
+
+    websearch_to_tsquery не различает регистр и лишние пробелы, поэтому при
+    полнотекстовом поиске они отбрасываются. ILIKE различает и то и другое
+    (SQLite — регистр не-ASCII букв), там ключ — search как есть.
+    """
+    if search and _use_fulltext_search(db):
+        return " ".join(search.split()).lower()
+    return search
+
+
+def _use_fulltext_search(db: AsyncSession) -> bool:
+    if SEARCH_BACKEND == "auto":
+        return db.get_bind().dialect.name == "postgresql"
+    return SEARCH_BACKEND == "fts"
+
+
+def _search_tsquery(search: str):
+    """Запрос в обеих конфигурациях: морфология russian ИЛИ точные слова simple"""
+    return func.websearch_to_tsquery("russian", search).op("||")(
+        func.websearch_to_tsquery("simple", search)
+    )
+
+
+def product_cursor(product, sort: str = None) -> str:
+    """Курсор, указывающий на позицию сразу после данного товара (строки list_products)"""
+    search_rank = getattr(product, "search_rank", None)
+    if search_rank is not None:
+        return encode_cursor(
+            RELEVANCE_ORDER, [str(search_rank), product.created_at, product.id]
+        )
+    order = sort or PRODUCT_ORDER
+    keys, _ = PRODUCT_SORTS[order]
+    return encode_cursor(order, [getattr(product, key.key) for key in keys])
+
+
+def _decode_product_cursor(cursor: str, order: str) -> list:
+    values = decode_cursor(cursor, order)
+    try:
+        if order == RELEVANCE_ORDER:
+            rank, created_at, product_id = values
+            return [Decimal(rank), datetime.fromisoformat(created_at), str(product_id)]
+        first, product_id = values
+        if order == PRODUCT_ORDER:
+            return [datetime.fromisoformat(first), str(product_id)]
+        return [float(first), str(product_id)]
+    except (TypeError, ValueError, ArithmeticError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+async def suggest_products(db: AsyncSession, q: str, limit: int = 8) -> dict:
+    """Подсказки для строки поиска: похожие названия товаров и категории.
+
+    На PostgreSQL используется word_similarity из pg_trgm (оператор <%
+    обслуживается триграммным индексом), поэтому находятся и слова с опечатками.
+    """
+    if _use_fulltext_search(db):
+        title_score = func.word_similarity(q, models.Product.title)
+        titles_stmt = (
+            select(models.Product.title)
+            .where(models.Product.title.op("%>")(q))
+            .group_by(models.Product.title)
+            .order_by(func.max(title_score).desc(), models.Product.title)
+        )
+        category_score = func.word_similarity(q, models.Category.name)
+        categories_stmt = (
+            select(models.Category)
+            .where(models.Category.name.op("%>")(q))
+            .order_by(category_score.desc(), models.Category.name)
+        )
+    else:
+        titles_stmt = (
+            select(models.Product.title)
+            .where(models.Product.title.ilike(f"%{q}%"))
+            .distinct()
+            .order_by(models.Product.title)
+        )
+        categories_stmt = (
+            select(models.Category)
+            .where(models.Category.name.ilike(f"%{q}%"))
+            .order_by(models.Category.name)
+        )
+    titles = (await db.execute(titles_stmt.limit(limit))).scalars().all()
+    categories = (await db.execute(categories_stmt.limit(limit))).scalars().all()
+    return {"titles": list(titles), "categories": categories}
+
+
+async def get_product(db: AsyncSession, product_id: str, fields: tuple = None):
+    """Получить товар по ID строкой с полями fields (как в list_products)"""
+    result = await db.execute(
+        _select_product_fields(fields)
+        .select_from(models.Product)
+        .where(models.Product.id == product_id)
+    )
+    return result.first()
+
+
+async def create_message(db: AsyncSession, data: schemas.MessageCreate):
     msg = models.Message(**data.dict())
     db.add(msg)
-    db.commit()
-    db.refresh(msg)
+    await db.commit()
     return msg
 
 
-def create_order(db: Session, data: schemas.OrderCreate):
+async def list_messages_by_product(db: AsyncSession, product_id: str):
+    result = await db.execute(
+        select(models.Message)
+        .where(models.Message.product_id == product_id)
+        .order_by(models.Message.created_at.asc())
+    )
+    return result.scalars().all()
+
+
+async def create_order(db: AsyncSession, data: schemas.OrderCreate):
     order = models.Order(**data.dict())
     db.add(order)
-    db.commit()
-    db.refresh(order)
+    await db.commit()
     return order
@@ -0,0 +1,7 @@
+# app/dependencies.py
+from .db import AsyncSessionLocal
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
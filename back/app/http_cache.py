@@ -0,0 +1,92 @@
+# app/http_cache.py
+"""Условные GET-запросы (ETag / If-None-Match, Last-Modified / If-Modified-Since) и Range."""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request
+
+
+def make_etag(*parts) -> str:
+    """Сильный ETag из произвольных частей (версии, параметров, тела ответа)"""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Совпадает ли ETag с одним из значений заголовка If-None-Match.
+
+    Сравнение слабое (RFC 9110, 13.1.2): префикс W/ не учитывается.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def http_date(value: datetime) -> str:
+    """Дата для Last-Modified; naive datetime из БД считаются UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified_since(request: Request, last_modified: datetime) -> bool:
+    """Не изменился ли ресурс с момента из If-Modified-Since.
+
+    Заголовок учитывается, только если нет If-None-Match (RFC 9110, 13.1.3).
+    """
+    header = request.headers.get("if-modified-since")
+    if not header or request.headers.get("if-none-match"):
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP-даты с точностью до секунды
+    return last_modified.replace(microsecond=0) <= since
+
+
+class RangeNotSatisfiable(Exception):
+    """Диапазон из Range целиком за пределами объекта (ответ 416)"""
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Заголовок "Range: bytes=..." с одним диапазоном → (start, end) включительно.
+
+    None — отдать объект целиком: заголовка нет, другие единицы, несколько
+    диапазонов или ошибка синтаксиса (RFC 9110 разрешает их игнорировать).
+    RangeNotSatisfiable — диапазон за пределами объекта.
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, dash, last = spec.strip().partition("-")
+    if not dash or not (first + last).isdigit():
+        return None
+
+    if not first:
+        # Суффикс "bytes=-500": последние 500 байт
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise RangeNotSatisfiable
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
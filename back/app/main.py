@@ -1,7 +1,10 @@
 # app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .db import Base, engine
+from .compression import CompressionMiddleware
+from .db import Base, engine, async_engine, AsyncSessionLocal, pool_status
+from . import crud
+from .services import images
 from .routers import users, products, orders, messages, categories, media
 from .logger import setup_logging
 import logging
@@ -40,7 +43,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["Content-Length", "Content-Type", "Cache-Control"],  # Expose for browser
+    expose_headers=["Content-Length", "Content-Type", "Cache-Control", "ETag", "Last-Modified", "Accept-Ranges", "Content-Range", "X-Next-Cursor", "X-Total-Count", "X-Total-Count-Approximate"],  # Expose for browser
+)
+
+# Сжатие JSON-ответов (brotli, если установлен пакет brotli, иначе gzip).
+# Картинки из /media/download уже сжаты, их не трогаем
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    gzip_level=int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),
+    brotli_quality=int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4")),
+    exclude_paths=("/media/download",),
 )
 
 
@@ -71,10 +84,35 @@ app.include_router(orders.router, prefix="/orders", tags=["orders"])
 app.include_router(messages.router, prefix="/messages", tags=["messages"])
 
 
+@app.on_event("startup")
+async def warm_caches():
+    """Загрузить справочник категорий до первых запросов (разрешение category по названию)"""
+    try:
+        async with AsyncSessionLocal() as db:
+            await crud.categories_snapshot(db)
+    except Exception as e:
+        # Кэш заполнится при первом обращении, запуск из-за этого не прерываем
+        logger.warning("Failed to warm category cache: %s", e)
+
+
+@app.on_event("shutdown")
+def stop_image_workers():
+    images.shutdown()
+
+
 @app.get("/health")
 def health_check():
     """Проверка здоровья API"""
     return {"status": "ok", "service": "2ndWear Backend"}
 
 
+@app.get("/metrics/db-pool")
+def db_pool_metrics():
+    """Состояние пулов соединений с БД (по текущему процессу)"""
+    return {
+        "async": pool_status(async_engine.pool),
+        "sync": pool_status(engine.pool),
+    }
+
+
 logger.info("2ndWear backend started")
@@ -1,20 +1,72 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Index, DDL, event, literal_column, Uuid
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
+from sqlalchemy.types import TypeDecorator
 from datetime import datetime
 from .db import Base
+import os
+import time
 import uuid
 
+# Заведомо несуществующий ключ для id, которые не разбираются как UUID
+NIL_UUID = uuid.UUID(int=0)
+
+
+def uuid7() -> uuid.UUID:
+    """UUIDv7 (RFC 9562): 48 бит unix-времени в мс, затем случайные биты.
+
+    Новые ключи растут со временем, поэтому вставки попадают в правый край
+    B-tree индекса, а не в случайные страницы, как у uuid4.
+    """
+    ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    value = (
+        (ms & 0xFFFF_FFFF_FFFF) << 80
+        | 0x7 << 76                                   # версия
+        | (rand >> 68 & 0xFFF) << 64                  # rand_a
+        | 0b10 << 62                                  # вариант RFC 4122
+        | rand & 0x3FFF_FFFF_FFFF_FFFF                # rand_b
+    )
+    return uuid.UUID(int=value)
+
 
 def generate_uuid():
-    """Генерирует UUID как строку без дефисов (32 символа)"""
-    return uuid.uuid4().hex
+    """Генерирует UUIDv7 как строку без дефисов (32 символа)"""
+    return uuid7().hex
+
+
+class HexUUID(TypeDecorator):
+    """Ключ-UUID: в PostgreSQL нативный uuid (16 байт), в SQLite CHAR(32).
+
+    В Python и API — строка hex из 32 символов, как у прежних String(32),
+    поэтому схемы ответов и ссылки клиентов не меняются. На вход принимается
+    и hex, и UUID с дефисами.
+    """
+
+    impl = Uuid
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(as_uuid=True)
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        try:
+            return uuid.UUID(value)
+        except (TypeError, ValueError, AttributeError):
+            # Поиск по «мусорному» id просто ничего не находит (404), как раньше со строками
+            return NIL_UUID
+
+    def process_result_value(self, value, dialect):
+        return value.hex if value is not None else None
 
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(String(32), primary_key=True, index=True, default=generate_uuid)
+    id = Column(HexUUID, primary_key=True, index=True, default=generate_uuid)
     username = Column(String, unique=True, nullable=True)
     telegram_id = Column(String, nullable=True)
     contact = Column(String, nullable=True)  # телефон или иной контакт
@@ -22,6 +74,11 @@ class User(Base):
     products = relationship("Product", back_populates="seller")
     messages = relationship("Message", back_populates="sender")
 
+    # Уникальный индекс — цель ON CONFLICT (telegram_id) для upsert из бота
+    __table_args__ = (
+        Index("ux_users_telegram_id", telegram_id, unique=True),
+    )
+
 
 class Category(Base):
     """Категория одежды (Одежда, Обувь, Аксессуары и т.д.)"""
@@ -36,8 +93,8 @@ class Category(Base):
 class Product(Base):
     __tablename__ = "products"
 
-    id = Column(String(32), primary_key=True, index=True, default=generate_uuid)
-    seller_id = Column(String(32), ForeignKey("users.id"))
+    id = Column(HexUUID, primary_key=True, index=True, default=generate_uuid)
+    seller_id = Column(HexUUID, ForeignKey("users.id"), index=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)  # FK на Category
     
     title = Column(String, nullable=False)
@@ -61,13 +118,89 @@ class Product(Base):
     seller = relationship("User", back_populates="products")
     category_obj = relationship("Category", back_populates="products")
 
+    # Индексы повторяют формы запросов crud.list_products: равенство по фильтрам
+    # + сортировка (created_at desc, id desc), чтобы Postgres читал страницу из индекса
+    # без сортировки. Индексы по атрибутам частичные: NULL-значения по ним не ищут.
+    __table_args__ = (
+        Index("ix_products_created_at_id", created_at.desc(), id.desc()),
+        Index("ix_products_section_created_at_id", section, created_at.desc(), id.desc()),
+        # Сортировки по цене (price, id): один индекс читается в обе стороны,
+        # он же обслуживает фильтр min_price/max_price
+        Index("ix_products_price_id", price, id),
+        Index("ix_products_section_price_id", section, price, id),
+        Index(
+            "ix_products_section_category_created_at_id",
+            section, category_id, created_at.desc(), id.desc(),
+            postgresql_where=category_id.isnot(None),
+        ),
+        Index(
+            "ix_products_section_size_created_at_id",
+            section, size, created_at.desc(), id.desc(),
+            postgresql_where=size.isnot(None),
+        ),
+        Index(
+            "ix_products_section_gender_created_at_id",
+            section, gender, created_at.desc(), id.desc(),
+            postgresql_where=gender.isnot(None),
+        ),
+        Index(
+            "ix_products_section_condition_created_at_id",
+            section, condition, created_at.desc(), id.desc(),
+            postgresql_where=condition.isnot(None),
+        ),
+    )
+
+
+# Полнотекстовый поиск (только PostgreSQL): generated-колонка search_vector
+# по title/description. Конфигурация russian даёт морфологию, simple — точные
+# совпадения брендов и латиницы. В модели колонка не объявлена, чтобы схема
+# оставалась совместимой с SQLite; crud обращается к ней через PRODUCT_SEARCH_VECTOR.
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('russian'::regconfig, coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('russian'::regconfig, coalesce(description, '')), 'B') || "
+    "to_tsvector('simple'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))"
+)
+ADD_SEARCH_VECTOR_SQL = (
+    "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+)
+SEARCH_VECTOR_INDEX_SQL = (
+    "CREATE INDEX {concurrently} IF NOT EXISTS ix_products_search_vector "
+    "ON products USING gin (search_vector)"
+)
+PRODUCT_SEARCH_VECTOR = literal_column("products.search_vector", type_=TSVECTOR)
+
+# Подсказки с опечатками (только PostgreSQL): триграммный GIN-индекс по title
+TRGM_EXTENSION_SQL = "CREATE EXTENSION IF NOT EXISTS pg_trgm"
+TITLE_TRGM_INDEX_SQL = (
+    "CREATE INDEX {concurrently} IF NOT EXISTS ix_products_title_trgm "
+    "ON products USING gin (title gin_trgm_ops)"
+)
+
+event.listen(
+    Product.__table__, "after_create",
+    DDL(ADD_SEARCH_VECTOR_SQL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__, "after_create",
+    DDL(SEARCH_VECTOR_INDEX_SQL.format(concurrently="")).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__, "after_create",
+    DDL(TRGM_EXTENSION_SQL).execute_if(dialect="postgresql"),
+)
+event.listen(
+    Product.__table__, "after_create",
+    DDL(TITLE_TRGM_INDEX_SQL.format(concurrently="")).execute_if(dialect="postgresql"),
+)
+
 
 class Message(Base):
     __tablename__ = "messages"
 
-    id = Column(String(32), primary_key=True, default=generate_uuid)
-    product_id = Column(String(32), ForeignKey("products.id"))
-    sender_id = Column(String(32), ForeignKey("users.id"))
+    id = Column(HexUUID, primary_key=True, default=generate_uuid)
+    product_id = Column(HexUUID, ForeignKey("products.id"), index=True)
+    sender_id = Column(HexUUID, ForeignKey("users.id"))
 
     text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -78,8 +211,8 @@ class Message(Base):
 class Order(Base):
     __tablename__ = "orders"
 
-    id = Column(String(32), primary_key=True, default=generate_uuid)
-    buyer_id = Column(String(32), ForeignKey("users.id"))
-    product_id = Column(String(32), ForeignKey("products.id"))
+    id = Column(HexUUID, primary_key=True, default=generate_uuid)
+    buyer_id = Column(HexUUID, ForeignKey("users.id"), index=True)
+    product_id = Column(HexUUID, ForeignKey("products.id"), index=True)
     status = Column(String, default="initiated")  # initiated, confirmed, completed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,29 @@
+# app/pagination.py
+"""Непрозрачные курсоры для keyset-пагинации."""
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(order: str, values: list) -> str:
+    """Упаковать ключ сортировки последней строки страницы в курсор."""
+    payload = {
+        "o": order,
+        "k": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, order: str) -> list:
+    """Распаковать курсор. Бросает ValueError, если он повреждён или от другой сортировки."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = payload["k"]
+        cursor_order = payload["o"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_order != order or not isinstance(values, list):
+        raise ValueError("Cursor does not match the requested ordering")
+    return values
@@ -1,39 +1,45 @@
 # app/routers/categories.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import crud, schemas, models
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..dependencies import get_db
+from ..http_cache import etag_matches, make_etag
+from .. import crud, schemas
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/", response_model=schemas.Category)
-def create_category(data: schemas.CategoryCreate, db: Session = Depends(get_db)):
+async def create_category(data: schemas.CategoryCreate, db: AsyncSession = Depends(get_db)):
     """Создать новую категорию"""
     logger.info("Creating category: name=%s", data.name)
-    return crud.create_category(db, data.name)
+    return await crud.create_category(db, data.name)
+
+
+# Браузер может хранить ответ, но обязан ревалидировать его по ETag
+CACHE_CONTROL = "no-cache"
 
 
 @router.get("/", response_model=list[schemas.Category])
-def list_categories(db: Session = Depends(get_db)):
-    """Получить все категории"""
-    return crud.list_categories(db)
+async def list_categories(request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """Получить все категории (поддерживает If-None-Match)"""
+    snapshot = await crud.categories_snapshot(db)
+    headers = {"ETag": snapshot["etag"], "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, snapshot["etag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return snapshot["items"]
 
 
 @router.get("/{category_id}", response_model=schemas.Category)
-def get_category(category_id: int, db: Session = Depends(get_db)):
-    """Получить категорию по ID"""
-    category = db.query(models.Category).filter(models.Category.id == category_id).first()
+async def get_category(category_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)):
+    """Получить категорию по ID (поддерживает If-None-Match)"""
+    category = await crud.get_category(db, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
+    headers = {"ETag": make_etag(category.id, category.name), "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return category
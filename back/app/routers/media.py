@@ -1,55 +1,231 @@
 # app/routers/media.py
+import asyncio
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from concurrent.futures.process import BrokenProcessPool
+from typing import Literal
+from fastapi import APIRouter, UploadFile, File, Header, HTTPException, Request, Response
 from fastapi.responses import StreamingResponse
+from minio.error import S3Error
+from PIL import Image
+from starlette.concurrency import run_in_threadpool
+from ..http_cache import (
+    RangeNotSatisfiable, etag_matches, http_date, make_etag, not_modified_since, parse_range,
+)
+from ..services import image_cache, images
 from ..services.storage import MinioStorage
-import io
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 storage = MinioStorage()
 
+# S3 error codes for a missing object
+NOT_FOUND_CODES = ("NoSuchKey", "NoSuchObject", "ResourceNotFound")
+
+# Image keys are random and never reused for other content, so a response
+# may be cached for a year and never revalidated
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 @router.post("/upload")
 async def upload_image(file: UploadFile = File(...)):
-    """Upload image to MinIO and return download path."""
+    """Upload image to MinIO and return download path.
+
+    Besides the original, resized derivatives (images.DERIVATIVE_SIZES in
+    WebP and JPEG) are built in the image process pool and stored next to
+    it; /media/download serves them with ?size=.
+    """
     try:
         content = await file.read()
-        result = storage.upload_bytes(content, content_type=file.content_type or "image/jpeg")
+        result = await run_in_threadpool(
+            storage.upload_bytes, content, file.content_type or "image/jpeg"
+        )
         logger.info("Image uploaded to storage: key=%s", result["key"])
-        return {"image_url": result["url"], "image_key": result["key"]}
     except Exception as e:
         logger.exception("Failed to upload image: %s", e)
         raise HTTPException(status_code=500, detail="Failed to upload image")
 
+    sizes = await store_derivatives(result["key"], content)
+    return {"image_url": result["url"], "image_key": result["key"], "sizes": sizes}
+
+
+async def store_derivatives(image_key: str, content: bytes) -> list[str]:
+    """Build and store derivatives of an uploaded image; returns the stored sizes.
+
+    A failure here does not fail the upload: download falls back to the original.
+    """
+    try:
+        derivatives = await images.make_derivatives(content)
+        await asyncio.gather(*(
+            run_in_threadpool(
+                storage.put_bytes,
+                images.derivative_key(image_key, size, fmt),
+                data,
+                images.content_type(fmt),
+            )
+            for (size, fmt), data in derivatives.items()
+        ))
+    except Exception as e:
+        logger.warning("Failed to build image derivatives: key=%s error=%s", image_key, e)
+        return []
+    return [size for size in images.DERIVATIVE_SIZES if (size, "jpeg") in derivatives]
+
 
 @router.get("/download/{image_key}")
-async def download_image(image_key: str):
-    """Download image from MinIO (backend proxy for security)."""
+async def download_image(
+    request: Request,
+    image_key: str,
+    size: Literal["thumb", "card", "full"] | None = None,
+    format: Literal["webp", "jpeg"] | None = None,
+    range: str | None = Header(None),
+    if_range: str | None = Header(None),
+):
+    """Download image from MinIO (backend proxy for security).
+
+    The body is streamed from MinIO in chunks of MEDIA_CHUNK_SIZE bytes, so
+    memory per download stays constant and the first byte goes out as soon
+    as MinIO sends it. Blocking MinIO calls run in the threadpool.
+
+    A single byte range (Range: bytes=0-1023, bytes=1024-, bytes=-1024) is
+    answered with 206 and only that part is read from MinIO.
+
+    ETag (from MinIO) and Last-Modified allow revalidation: a matching
+    If-None-Match / If-Modified-Since gets 304 after stat_object alone.
+
+    size=thumb|card|full returns a resized derivative (see images.DERIVATIVE_SIZES),
+    in WebP if the client accepts it, else JPEG; format=webp|jpeg forces one.
+    Images uploaded before derivatives existed are served as the original.
+    """
+    # Validate image_key to prevent directory traversal
+    if "/" in image_key or ".." in image_key:
+        raise HTTPException(status_code=400, detail="Invalid image key")
+
+    object_key = image_key
+    if size is not None:
+        fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+        object_key = images.derivative_key(image_key, size, fmt)
+
+    logger.info("Downloading image: key=%s range=%s", object_key, range)
     try:
-        # Validate image_key to prevent directory traversal
-        if "/" in image_key or ".." in image_key:
-            raise HTTPException(status_code=400, detail="Invalid image key")
-        
-        logger.info("Downloading image: key=%s", image_key)
-        
-        # Retrieve from MinIO
-        image_bytes, content_length = storage.get_object(image_key)
-        
-        # Create BytesIO stream and reset position to start
-        file_stream = io.BytesIO(image_bytes)
-        file_stream.seek(0)  # CRITICAL: Reset to beginning of stream
-        
-        # Stream back to client with proper headers
-        return StreamingResponse(
-            file_stream,
-            media_type="image/jpeg",
-            headers={
-                "Cache-Control": "public, max-age=86400",  # Cache for 1 day
-                "Content-Length": str(content_length),  # Required for proper streaming
-                "Accept-Ranges": "bytes"  # Support range requests
-            }
+        # Content-Length and Content-Type come from metadata, before reading the body
+        try:
+            stat = await run_in_threadpool(storage.stat_object, object_key)
+        except S3Error as e:
+            if object_key == image_key or e.code not in NOT_FOUND_CODES:
+                raise
+            object_key = image_key
+            stat = await run_in_threadpool(storage.stat_object, object_key)
+        etag = f'"{stat.etag}"'
+        headers = {
+            "Cache-Control": IMAGE_CACHE_CONTROL,
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+        }
+        if size is not None and format is None:
+            # The same URL returns WebP or JPEG depending on Accept
+            headers["Vary"] = "Accept"
+        if stat.last_modified is not None:
+            headers["Last-Modified"] = http_date(stat.last_modified)
+        if etag_matches(request, etag) or (
+            stat.last_modified is not None and not_modified_since(request, stat.last_modified)
+        ):
+            return Response(status_code=304, headers=headers)
+
+        # If-Range: send the range only if the client's copy is still current
+        if if_range is not None and if_range.strip() != etag:
+            range = None
+        try:
+            byte_range = parse_range(range, stat.size)
+        except RangeNotSatisfiable:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{stat.size}"},
+            )
+
+        if byte_range is None:
+            status_code, offset, length = 200, 0, stat.size
+        else:
+            start, end = byte_range
+            status_code, offset, length = 206, start, end - start + 1
+            headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+        # length=0 would mean "to the end" for MinIO, so only pass a real range
+        response = await run_in_threadpool(
+            storage.open_object, object_key, offset, length if byte_range else 0
         )
+    except S3Error as e:
+        if e.code in NOT_FOUND_CODES:
+            raise HTTPException(status_code=404, detail="Image not found")
+        logger.exception("Failed to download image: %s", e)
+        raise HTTPException(status_code=502, detail="Storage error")
     except Exception as e:
         logger.exception("Failed to download image: %s", e)
-        raise HTTPException(status_code=404, detail="Image not found")
+        raise HTTPException(status_code=502, detail="Storage unavailable")
+
+    # A sync iterator: Starlette pulls each chunk in the threadpool
+    return StreamingResponse(
+        storage.iter_object(response),
+        status_code=status_code,
+        media_type=stat.content_type or "image/jpeg",
+        headers={**headers, "Content-Length": str(length)},
+    )
+
+
+@router.get("/image/{image_key}")
+async def resized_image(
+    request: Request,
+    image_key: str,
+    w: int | None = None,
+    h: int | None = None,
+    fit: Literal["contain", "cover"] = "contain",
+    format: Literal["webp", "jpeg"] | None = None,
+):
+    """Image resized on demand to w x h (for layouts not covered by ?size= derivatives).
+
+    - w, h: one of image_cache.ALLOWED_DIMENSIONS; at least one is required
+    - fit: contain (inside the box, no upscaling) or cover (fill the box, needs w and h)
+    - format: webp or jpeg; by default WebP if the client accepts it
+
+    The first request renders the image in the image worker pool; the result
+    is kept in a size-bounded disk LRU (IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB).
+    Identical concurrent requests share one render.
+    """
+    if "/" in image_key or ".." in image_key:
+        raise HTTPException(status_code=400, detail="Invalid image key")
+    if w is None and h is None:
+        raise HTTPException(status_code=400, detail="Specify w or h")
+    for value in (w, h):
+        if value is not None and value not in image_cache.ALLOWED_DIMENSIONS:
+            allowed = ", ".join(map(str, image_cache.ALLOWED_DIMENSIONS))
+            raise HTTPException(status_code=400, detail=f"Unsupported dimension {value}; allowed: {allowed}")
+    if fit == "cover" and (w is None or h is None):
+        raise HTTPException(status_code=400, detail="fit=cover requires both w and h")
+
+    fmt = format or ("webp" if "image/webp" in request.headers.get("accept", "") else "jpeg")
+    # The original behind a key never changes, so the parameters identify the bytes
+    etag = make_etag(image_key, w, h, fit, fmt)
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": etag}
+    if format is None:
+        headers["Vary"] = "Accept"
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    async def load_source():
+        data, _ = await run_in_threadpool(storage.get_object, image_key)
+        return data
+
+    try:
+        data = await image_cache.get_resized(image_key, w, h, fit, fmt, load_source)
+    except S3Error as e:
+        if e.code in NOT_FOUND_CODES:
+            raise HTTPException(status_code=404, detail="Image not found")
+        logger.exception("Failed to load image for resize: %s", e)
+        raise HTTPException(status_code=502, detail="Storage error")
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # Pillow cannot decode the original (not an image, truncated or too many pixels)
+        logger.warning("Failed to resize image: key=%s error=%s", image_key, e)
+        raise HTTPException(status_code=415, detail="Unsupported image")
+    except BrokenProcessPool as e:
+        # The pool broke again right after being rebuilt (see images._run_in_pool)
+        logger.error("Image workers unavailable: key=%s error=%s", image_key, e)
+        raise HTTPException(status_code=503, detail="Image processing unavailable")
+
+    return Response(content=data, media_type=images.content_type(fmt), headers=headers)
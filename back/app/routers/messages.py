@@ -1,30 +1,17 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import SessionLocal
-from .. import crud, schemas, models
+from ..dependencies import get_db
+from .. import crud, schemas
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/", response_model=schemas.Message)
-def send_message(data: schemas.MessageCreate, db: Session = Depends(get_db)):
-    return crud.create_message(db, data)
+async def send_message(data: schemas.MessageCreate, db: AsyncSession = Depends(get_db)):
+    return await crud.create_message(db, data)
 
 
 @router.get("/product/{product_id}", response_model=list[schemas.Message])
-def get_messages_by_product(product_id: int, db: Session = Depends(get_db)):
-    return (
-        db.query(models.Message)
-        .filter(models.Message.product_id == product_id)
-        .order_by(models.Message.created_at.asc())
-        .all()
-    )
\ No newline at end of file
+async def get_messages_by_product(product_id: str, db: AsyncSession = Depends(get_db)):
+    return await crud.list_messages_by_product(db, product_id)
\ No newline at end of file
@@ -1,48 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import SessionLocal
+from ..dependencies import get_db
 from .. import crud, schemas, models
 
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.post("/", response_model=schemas.Order)
-def create_order(data: schemas.OrderCreate, db: Session = Depends(get_db)):
-    product = db.query(models.Product).filter(models.Product.id == data.product_id).first()
+async def create_order(data: schemas.OrderCreate, db: AsyncSession = Depends(get_db)):
+    product = await db.get(models.Product, data.product_id)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return crud.create_order(db, data)
+    return await crud.create_order(db, data)
 
 
 @router.get("/{order_id}", response_model=schemas.Order)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+async def get_order(order_id: str, db: AsyncSession = Depends(get_db)):
+    order = await db.get(models.Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
 
 @router.get("/{order_id}/summary")
-def order_summary(order_id: int, db: Session = Depends(get_db)):
+async def order_summary(order_id: str, db: AsyncSession = Depends(get_db)):
     """
     Демонстрационный эндпоинт для питча:
     показывает комиссию и распределение денег.
     """
-    order = db.query(models.Order).filter(models.Order.id == order_id).first()
+    order = await db.get(models.Order, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    product = db.query(models.Product).filter(models.Product.id == order.product_id).first()
+    product = await db.get(models.Product, order.product_id)
     fee = round(product.price * 0.1, 2)
 
     return {
@@ -1,34 +1,161 @@
 # app/routers/products.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..db import SessionLocal
-from .. import crud, schemas, models
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..cache import TTLCache
+from ..dependencies import get_db
+from ..http_cache import etag_matches, make_etag
+from .. import crud, schemas
+from typing import Any, Literal
 import logging
+import orjson
+import os
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Короткие префиксы (1-3 символа) вводятся чаще всего и дают самые «широкие»
+# запросы, поэтому подсказки для них кэшируются в памяти процесса
+SUGGEST_CACHE_PREFIX_LEN = int(os.getenv("SUGGEST_CACHE_PREFIX_LEN", "3"))
+suggest_cache = TTLCache(
+    maxsize=int(os.getenv("SUGGEST_CACHE_SIZE", "2048")),
+    ttl=float(os.getenv("SUGGEST_CACHE_TTL", "60")),
+)
+
+# Фасеты пересчитываются не чаще раза в FACETS_CACHE_TTL секунд на набор фильтров
+facets_cache = TTLCache(
+    maxsize=int(os.getenv("FACETS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("FACETS_CACHE_TTL", "30")),
+)
+
+# Сколько товаров можно создать одним запросом POST /products/bulk.
+# Лимит PostgreSQL на параметры запроса не мешает: crud режет INSERT на
+# части (crud.BULK_INSERT_CHUNK), а ограничивает это размер транзакции
+BULK_MAX_ITEMS = int(os.getenv("PRODUCTS_BULK_MAX_ITEMS", "500"))
+
+# Готовые JSON-ответы списка товаров по (версия каталога, нормализованный запрос)
+listing_cache = TTLCache(
+    maxsize=int(os.getenv("LISTING_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("LISTING_CACHE_TTL", "10")),
+)
+
+# X-Total-Count по нормализованному набору фильтров (без сортировки и страницы)
+count_cache = TTLCache(
+    maxsize=int(os.getenv("PRODUCT_COUNT_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("PRODUCT_COUNT_CACHE_TTL", "30")),
+)
+COUNT_FILTERS = (
+    "search", "category_id", "section", "size", "color", "style", "gender", "condition",
+    "min_price", "max_price",
+)
+
+# Клиент может хранить ответ, но обязан ревалидировать его по ETag.
+# Last-Modified не отдаётся: тело зависит и от users (имя/контакт продавца),
+# поэтому время добавления товара не говорит, изменился ли ответ
+CACHE_CONTROL = "no-cache"
+PRODUCT_FIELDS = tuple(schemas.Product.__fields__)
+
+
+def _parse_fields(fields: str | None) -> tuple:
+    """fields=title,price → поля в порядке schemas.Product; без параметра — все"""
+    if not fields:
+        return PRODUCT_FIELDS
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested.difference(PRODUCT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in PRODUCT_FIELDS if name in requested)
+
+
+def _row_payload(row, fields: tuple) -> dict:
+    # Колонки строки идут в порядке fields, служебные (курсор, search_rank) — после них
+    return dict(zip(fields, row))
+
+
+def _json_body(content) -> bytes:
+    return orjson.dumps(content)
+
+
+def _cached_response(request: Request, body: bytes, etag: str, headers: dict) -> Response:
+    headers = {**headers, "ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.post("/", response_model=schemas.Product)
-def create_product(
+async def create_product(
     data: schemas.ProductCreate,
     seller_id: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Создать новый товар (из Telegram-бота или фронтенда)"""
+    """Создать новый товар (из Telegram-бота или фронтенда)
+
+    Категорию можно передать как category_id или по названию в поле category.
+    """
     logger.info("Creating product: seller_id=%s, title=%s", seller_id, data.title)
-    return crud.create_product(db, data, seller_id)
+    return await crud.create_product(db, data, seller_id)
+
+
+@router.post(
+    "/bulk",
+    response_model=schemas.ProductBulkResult,
+    responses={422: {"model": schemas.ProductBulkResult}},
+)
+async def create_products_bulk(
+    seller_id: str,
+    items: list[Any] = Body(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Создать пачку товаров одного продавца (импорт гардероба, благотворительная партия)
+
+    Тело запроса — список объектов в формате POST /products/. Товары
+    проверяются все вместе: если хотя бы один невалиден, ничего не создаётся
+    и ответ 422 содержит ошибки по позициям. Иначе все товары вставляются
+    одним INSERT в одной транзакции, ответ содержит их id в порядке запроса.
+    """
+    if not items:
+        raise HTTPException(status_code=400, detail="Empty product list")
+    if len(items) > BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many products in one request (max {BULK_MAX_ITEMS})",
+        )
+    logger.info("Creating %d products in bulk: seller_id=%s", len(items), seller_id)
+
+    products, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            product = schemas.ProductCreate.parse_obj(item)
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}"
+                for err in e.errors()
+            )
+            errors.append(schemas.BulkItemError(index=index, detail=detail))
+            continue
+        if product.category_id is not None and not await crud.get_category(db, product.category_id):
+            errors.append(schemas.BulkItemError(index=index, detail="category_id: Category not found"))
+            continue
+        products.append(product)
+
+    if errors:
+        result = schemas.ProductBulkResult(errors=errors)
+        return Response(content=result.json(), status_code=422, media_type="application/json")
+
+    try:
+        ids = await crud.create_products_bulk(db, products, seller_id)
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Seller not found")
+    return schemas.ProductBulkResult(ids=ids)
 
 
 @router.get("/", response_model=list[schemas.Product])
-def list_products(
+async def list_products(
+    request: Request,
     search: str | None = None,
     category_id: int | None = None,
     section: str | None = None,
@@ -37,58 +164,171 @@ def list_products(
     style: str | None = None,
     gender: str | None = None,
     condition: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    sort: Literal["newest", "price_asc", "price_desc"] | None = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: str | None = None,
+    fields: str | None = None,
+    with_total: bool = False,
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Получить список товаров с поддержкой фильтрации.
     
     Параметры:
-    - search: Поиск по названию или описанию
+    - search: Поиск по названию или описанию (на PostgreSQL — полнотекстовый, по релевантности)
     - section: market, swop, charity
     - size, color, style, gender, condition: Фильтры
-    - skip, limit: Пагинация
+    - min_price, max_price: Диапазон цены, границы включительно
+    - sort: newest (по умолчанию; при поиске — по релевантности), price_asc, price_desc
+    - skip, limit: Пагинация (устаревшая, для старых клиентов)
+    - cursor: Курсор следующей страницы из заголовка X-Next-Cursor
+    - fields: Через запятую — вернуть только эти поля (например, fields=id,title,price)
+    - with_total: Добавить заголовок X-Total-Count — сколько всего товаров под фильтрами.
+      Для больших выборок это оценка, тогда ответ содержит X-Total-Count-Approximate: true
+
+    Ответ содержит ETag; повторный запрос с If-None-Match получает 304 без тела.
     """
     logger.info(
         "Listing products: search=%s, section=%s, filters=[size=%s, color=%s, style=%s, gender=%s, condition=%s]",
         search, section, size, color, style, gender, condition
     )
-    products = crud.list_products(
-        db,
-        search=search,
-        category_id=category_id,
-        section=section,
-        size=size,
-        color=color,
-        style=style,
-        gender=gender,
-        condition=condition,
-        skip=skip,
-        limit=limit
-    )
-    
-    # Добавляем seller_username/contact для каждого товара
-    for product in products:
-        if product.seller:
-            if not product.seller_username:
-                product.seller_username = product.seller.username
-            if not product.seller_contact:
-                product.seller_contact = product.seller.contact
-    
-    return products
+    filters = {
+        "search": search,
+        "category_id": category_id,
+        "section": section,
+        "size": size,
+        "color": color,
+        "style": style,
+        "gender": gender,
+        "condition": condition,
+        "min_price": min_price,
+        "max_price": max_price,
+        "sort": sort,
+        "skip": skip if not cursor else 0,
+        "limit": limit,
+        "cursor": cursor,
+        "fields": _parse_fields(fields),
+    }
+    cache_key = (await crud.catalog_version(), tuple(sorted((k, v) for k, v in filters.items() if v is not None)))
+    cached = listing_cache.get(cache_key)
+    if cached is None:
+        headers = {}
+        try:
+            products = await crud.list_products(db, **filters)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        # Полная страница — значит, дальше могут быть ещё товары
+        if products and len(products) == limit:
+            headers["X-Next-Cursor"] = crud.product_cursor(products[-1], sort)
+
+        body = _json_body([_row_payload(row, filters["fields"]) for row in products])
+        cached = (body, make_etag(body), headers)
+        listing_cache.set(cache_key, cached)
+
+    body, etag, headers = cached
+    if with_total:
+        headers = {**headers, **await _total_count_headers(db, filters)}
+    return _cached_response(request, body, etag, headers)
+
+
+async def _total_count_headers(db: AsyncSession, filters: dict) -> dict:
+    count_filters = {k: filters[k] for k in COUNT_FILTERS}
+    cache_key = tuple(sorted((k, v) for k, v in count_filters.items() if v not in (None, "")))
+    cached = count_cache.get(cache_key)
+    if cached is None:
+        cached = await crud.count_products(db, **count_filters)
+        count_cache.set(cache_key, cached)
+    count, exact = cached
+    headers = {"X-Total-Count": str(count)}
+    if not exact:
+        headers["X-Total-Count-Approximate"] = "true"
+    return headers
+
+
+@router.get("/suggest", response_model=schemas.ProductSuggestions)
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(8, ge=1, le=20),
+    db: AsyncSession = Depends(get_db)
+):
+    """Подсказки для строки поиска (устойчивы к опечаткам на PostgreSQL)"""
+    q = " ".join(q.split())
+    if not q:
+        return {"titles": [], "categories": []}
+
+    cache_key = (q.lower(), limit)
+    cacheable = len(q) <= SUGGEST_CACHE_PREFIX_LEN
+    if cacheable:
+        cached = suggest_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    suggestions = await crud.suggest_products(db, q, limit=limit)
+    result = {
+        "titles": suggestions["titles"],
+        "categories": [{"id": c.id, "name": c.name} for c in suggestions["categories"]],
+    }
+    if cacheable:
+        suggest_cache.set(cache_key, result)
+    return result
+
+
+@router.get("/facets", response_model=schemas.ProductFacets)
+async def product_facets(
+    search: str | None = None,
+    category_id: int | None = None,
+    section: str | None = None,
+    size: str | None = None,
+    color: str | None = None,
+    style: str | None = None,
+    gender: str | None = None,
+    condition: str | None = None,
+    min_price: float | None = Query(None, ge=0),
+    max_price: float | None = Query(None, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Количество товаров по значениям size, color, style, gender, condition,
+    section и category_id. Принимает те же фильтры, что и список товаров.
+    """
+    filters = {
+        "search": search,
+        "category_id": category_id,
+        "section": section,
+        "size": size,
+        "color": color,
+        "style": style,
+        "gender": gender,
+        "condition": condition,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    # Нормализованный ключ: пустые фильтры не влияют на результат (цена 0 — не пустая).
+    # В запрос search уходит как есть
+    key_filters = dict(filters, search=crud.search_cache_key(db, search))
+    cache_key = tuple(sorted((k, v) for k, v in key_filters.items() if v not in (None, "")))
+    facets = facets_cache.get(cache_key)
+    if facets is None:
+        facets = await crud.product_facets(db, **filters)
+        facets_cache.set(cache_key, facets)
+    return facets
 
 
 @router.get("/{product_id}", response_model=schemas.Product)
-def get_product(product_id: str, db: Session = Depends(get_db)):
-    """Получить товар по ID"""
-    product = crud.get_product(db, product_id)
+async def get_product(
+    product_id: str,
+    request: Request,
+    fields: str | None = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """Получить товар по ID (поддерживает fields= и If-None-Match)"""
+    fields = _parse_fields(fields)
+    product = await crud.get_product(db, product_id, fields=fields)
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    # Добавляем username/contact продавца в response
-    if product.seller:
-        if not product.seller_username:
-            product.seller_username = product.seller.username
-        if not product.seller_contact:
-            product.seller_contact = product.seller.contact
-    return product
+    body = _json_body(_row_payload(product, fields))
+    return _cached_response(request, body, make_etag(body), {})
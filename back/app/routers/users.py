@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..db import SessionLocal
+from ..dependencies import get_db
 from .. import crud, schemas, models
 import logging
 
@@ -9,36 +11,34 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 
 @router.post("/", response_model=schemas.User)
-def create_user(data: schemas.UserCreate, db: Session = Depends(get_db)):
-    existing = db.query(models.User).filter(models.User.username == data.username).first()
+async def create_user(data: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.User).where(models.User.username == data.username))
+    existing = result.scalars().first()
     if existing:
         logger.warning("Attempt to create duplicate user: %s", data.username)
         raise HTTPException(status_code=400, detail="Username already exists")
 
-    return crud.create_user(db, data)
+    try:
+        return await crud.create_user(db, data)
+    except IntegrityError:
+        await db.rollback()
+        logger.warning("Attempt to create duplicate telegram user: %s", data.telegram_id)
+        raise HTTPException(status_code=400, detail="Telegram user already exists")
 
 
 @router.get("/{user_id}", response_model=schemas.User)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user(user_id: str, db: AsyncSession = Depends(get_db)):
+    user = await db.get(models.User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
 
 
 @router.post("/telegram/{telegram_id}", response_model=schemas.User)
-def get_or_create_telegram_user(telegram_id: str, data: schemas.UserCreate | None = None, db: Session = Depends(get_db)):
+async def get_or_create_telegram_user(telegram_id: str, data: schemas.UserCreate | None = None, db: AsyncSession = Depends(get_db)):
     """Endpoint for Telegram bot to sync username/contact."""
     username = data.username if data else None
     contact = data.contact if data else None
-    return crud.get_or_create_user(db, telegram_id, username=username, contact=contact)
\ No newline at end of file
+    return await crud.get_or_create_user(db, telegram_id, username=username, contact=contact)
\ No newline at end of file
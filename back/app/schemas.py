@@ -37,6 +37,8 @@ class ProductCreate(BaseModel):
     description: Optional[str] = None
     price: float
     category_id: Optional[int] = None
+    # Название категории (так присылает бот); используется, если нет category_id
+    category: Optional[str] = None
     image_url: Optional[str] = None
     image_key: Optional[str] = None
     seller_username: Optional[str] = None
@@ -74,6 +76,39 @@ class Product(BaseModel):
         orm_mode = True
 
 
+class BulkItemError(BaseModel):
+    index: int  # позиция товара в исходном списке
+    detail: str
+
+
+class ProductBulkResult(BaseModel):
+    """Результат пакетного создания: id в порядке запроса или ошибки по позициям"""
+    ids: list[str] = []
+    errors: list[BulkItemError] = []
+
+
+class ProductSuggestions(BaseModel):
+    """Подсказки для строки поиска"""
+    titles: list[str]
+    categories: list[Category]
+
+
+class FacetValue(BaseModel):
+    value: str
+    count: int
+
+
+class ProductFacets(BaseModel):
+    """Количество товаров по значениям фильтров каталога"""
+    size: list[FacetValue]
+    color: list[FacetValue]
+    style: list[FacetValue]
+    gender: list[FacetValue]
+    condition: list[FacetValue]
+    section: list[FacetValue]
+    category_id: list[FacetValue]
+
+
 class MessageCreate(BaseModel):
     product_id: str
     sender_id: str
@@ -0,0 +1,154 @@
+# app/services/image_cache.py
+"""On-demand resized images for /media/image: size-bounded disk LRU plus request coalescing."""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+from . import images
+
+logger = logging.getLogger(__name__)
+
+# Only these widths/heights are rendered: arbitrary values would let anyone
+# fill the cache (and the worker pool) with near-duplicate variants
+ALLOWED_DIMENSIONS = (64, 96, 128, 160, 240, 320, 360, 480, 640, 800, 960, 1280, 1600)
+FITS = ("contain", "cover")
+
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "2ndwear-images")
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "512"))
+
+
+class DiskLRUCache:
+    """Byte blobs on disk, evicted least-recently-used once max_bytes is exceeded.
+
+    The index lives in memory and is rebuilt from file mtimes on start, so
+    the cache survives restarts. Several workers may share the directory:
+    each evicts by its own view, and a file deleted by another worker is
+    simply a miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()  # file name -> size, oldest first
+        self._total = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith(".img"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total += size
+        self._evict()
+
+    @staticmethod
+    def _name(key: str) -> str:
+        return hashlib.sha1(key.encode()).hexdigest() + ".img"
+
+    def get(self, key: str) -> bytes | None:
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._forget(name)
+            return None
+        with self._lock:
+            if name not in self._entries:
+                # Written by another worker sharing the directory
+                self._entries[name] = len(data)
+                self._total += len(data)
+            self._entries.move_to_end(name)
+        try:
+            os.utime(path)  # recency for the next restart
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        name = self._name(key)
+        path = os.path.join(self.directory, name)
+        # Write-then-rename: readers never see a half-written file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._forget(name)
+            self._entries[name] = len(data)
+            self._total += len(data)
+            self._evict()
+
+    def _forget(self, name: str):
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self._total -= size
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def __len__(self):
+        return len(self._entries)
+
+
+cache = DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB * 2**20)
+
+# Renders in progress: identical concurrent requests wait for the same task
+_inflight: dict[str, asyncio.Task] = {}
+
+
+def cache_key(image_key: str, width: int | None, height: int | None, fit: str, fmt: str) -> str:
+    return f"{image_key}:{width or ''}x{height or ''}:{fit}:{fmt}"
+
+
+async def get_resized(image_key: str, width: int | None, height: int | None, fit: str, fmt: str, load_source) -> bytes:
+    """Resized image from the disk cache, rendering it on a miss.
+
+    load_source() is awaited only on a miss and returns the original bytes.
+    Concurrent calls with the same parameters share one lookup and one resize.
+    """
+    key = cache_key(image_key, width, height, fit, fmt)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_render(key, width, height, fit, fmt, load_source))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # shield: a client that disconnects must not cancel the render for the others
+    return await asyncio.shield(task)
+
+
+async def _render(key: str, width, height, fit: str, fmt: str, load_source) -> bytes:
+    data = await run_in_threadpool(cache.get, key)
+    if data is not None:
+        return data
+    source = await load_source()
+    data = await images.make_resized(source, width, height, fit, fmt)
+    try:
+        await run_in_threadpool(cache.put, key, data)
+    except OSError as e:
+        # A full or read-only disk should not break image delivery
+        logger.warning("Failed to cache resized image %s: %s", key, e)
+    return data
@@ -0,0 +1,133 @@
+# app/services/images.py
+"""Resized image derivatives (thumb/card/full in WebP and JPEG) built off the event loop."""
+import asyncio
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps
+
+# Longest side of each derivative, px. Smaller originals are never upscaled
+DERIVATIVE_SIZES = {
+    "thumb": 160,
+    "card": 480,
+    "full": 1600,
+}
+
+# format -> (Pillow format, file extension, content type, save options)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", "jpg", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+# Resizing is CPU-bound: a process pool keeps it off the event loop and the GIL
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "0")) or None  # None: one per CPU
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def derivative_key(image_key: str, size: str, fmt: str) -> str:
+    """Storage key of a derivative, next to the original: abc.jpg -> abc_card.webp"""
+    stem = image_key.rsplit(".", 1)[0]
+    return f"{stem}_{size}.{DERIVATIVE_FORMATS[fmt][1]}"
+
+
+def content_type(fmt: str) -> str:
+    return DERIVATIVE_FORMATS[fmt][2]
+
+
+def build_derivatives(data: bytes) -> dict:
+    """Decode an upload once and encode every size/format: {(size, fmt): bytes}.
+
+    Runs in a worker process, so it takes and returns plain bytes.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # Phone photos are often stored sideways with an EXIF orientation tag
+        image = ImageOps.exif_transpose(source)
+        image = _flatten(image)
+
+    result = {}
+    # Largest first: each smaller size is resized from the previous one, not from the original
+    for size, side in sorted(DERIVATIVE_SIZES.items(), key=lambda item: -item[1]):
+        image = image.copy()
+        image.thumbnail((side, side), Image.Resampling.LANCZOS)
+        for fmt in DERIVATIVE_FORMATS:
+            result[(size, fmt)] = _encode(image, fmt)
+    return result
+
+
+def resize_image(data: bytes, width: int | None, height: int | None, fit: str, fmt: str) -> bytes:
+    """Resize one image to a box and encode it (for /media/image; runs in a worker process).
+
+    fit=contain keeps the whole image inside width x height (either may be
+    None) without upscaling; fit=cover fills the box exactly, cropping the
+    overflow around the centre.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        # JPEG is decoded at a reduced scale right away when the box is much smaller
+        side = max(width or 0, height or 0)
+        source.draft("RGB", (side, side))
+        image = _flatten(ImageOps.exif_transpose(source))
+
+    if fit == "cover":
+        image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    else:
+        image.thumbnail((width or image.width, height or image.height), Image.Resampling.LANCZOS)
+    return _encode(image, fmt)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    pil_format, _, _, options = DERIVATIVE_FORMATS[fmt]
+    out = io.BytesIO()
+    image.save(out, pil_format, **options)
+    return out.getvalue()
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """RGB image; transparency is painted white since JPEG has no alpha channel"""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return _pool
+
+
+async def make_derivatives(data: bytes) -> dict:
+    """build_derivatives() in the process pool"""
+    return await _run_in_pool(build_derivatives, data)
+
+
+async def make_resized(data: bytes, width: int | None, height: int | None, fit: str, fmt: str) -> bytes:
+    """resize_image() in the process pool"""
+    return await _run_in_pool(resize_image, data, width, height, fit, fmt)
+
+
+async def _run_in_pool(func, *args):
+    """Run func in the pool; a broken pool (a worker was killed, e.g. OOM) is rebuilt once"""
+    global _pool
+    loop = asyncio.get_running_loop()
+    executor = pool()
+    try:
+        return await loop.run_in_executor(executor, func, *args)
+    except BrokenProcessPool:
+        # Concurrent callers may have replaced it already; drop only the broken one
+        if _pool is executor:
+            _pool = None
+        executor.shutdown(wait=False, cancel_futures=True)
+        return await loop.run_in_executor(pool(), func, *args)
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
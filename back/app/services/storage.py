@@ -6,6 +6,9 @@ from minio.error import S3Error
 from datetime import timedelta
 import uuid
 
+# Size of the pieces the download proxy reads from MinIO and sends to the client
+CHUNK_SIZE = int(os.getenv("MEDIA_CHUNK_SIZE", str(64 * 1024)))
+
 
 class MinioStorage:
     """S3-compatible storage wrapper for images."""
@@ -28,28 +31,60 @@ class MinioStorage:
     def upload_bytes(self, data: bytes, content_type: str = "image/jpeg") -> dict:
         """Upload bytes to storage and return image_key (for secure backend proxy)."""
         object_name = f"{uuid.uuid4().hex}.jpg"
-        data_stream = io.BytesIO(data)
+        self.put_bytes(object_name, data, content_type)
+
+        return {
+            "key": object_name,
+            "url": f"/media/download/{object_name}"  # Backend proxy path
+        }
+
+    def put_bytes(self, object_name: str, data: bytes, content_type: str):
+        """Store bytes under the given key (derivatives are stored next to their original)."""
         self.client.put_object(
             bucket_name=self.bucket,
             object_name=object_name,
-            data=data_stream,
+            data=io.BytesIO(data),
             length=len(data),
             content_type=content_type,
         )
 
-        return {
-            "key": object_name,
-            "url": f"/media/download/{object_name}"  # Backend proxy path
-        }
+    def stat_object(self, object_name: str):
+        """Object metadata (size, content_type, etag, last_modified) without reading the body."""
+        return self.client.stat_object(self.bucket, object_name)
 
-    def get_object(self, object_name: str) -> tuple:
-        """Retrieve file from storage (for backend proxy).
-        
-        Returns tuple of (bytes, content_length) to properly stream with Content-Length header.
+    def open_object(self, object_name: str, offset: int = 0, length: int = 0):
+        """Open the object body for streaming; close it with close_object().
+
+        offset/length select a byte range, so MinIO reads only those bytes
+        (length=0 means up to the end of the object).
+        """
+        return self.client.get_object(self.bucket, object_name, offset=offset, length=length)
+
+    @staticmethod
+    def iter_object(response, chunk_size: int = CHUNK_SIZE):
+        """Yield the body of an open_object() response chunk by chunk, then release it.
+
+        Only one chunk is held in memory at a time, whatever the object size.
         """
-        response = self.client.get_object(self.bucket, object_name)
-        file_data = response.read()
-        # Ensure response is properly closed
+        try:
+            yield from response.stream(chunk_size)
+        finally:
+            MinioStorage.close_object(response)
+
+    @staticmethod
+    def close_object(response):
         response.close()
         response.release_conn()
+
+    def get_object(self, object_name: str) -> tuple:
+        """Retrieve the whole file into memory.
+
+        Returns tuple of (bytes, content_length). The download proxy streams
+        with open_object()/iter_object() instead; use this only for small objects.
+        """
+        response = self.open_object(object_name)
+        try:
+            file_data = response.read()
+        finally:
+            self.close_object(response)
         return file_data, len(file_data)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: sync- и async-эндпоинты под конкурентной нагрузкой (PostgreSQL)
+
+Сравнивает пропускную способность GET /products/ в двух вариантах:
+  - sync: прежняя схема — def-эндпоинт, Session на psycopg2, пул потоков;
+  - async: текущий роутер — async def, AsyncSession на asyncpg.
+Нагрузка подаётся in-process через ASGI-транспорт httpx, поэтому сравнение
+отражает именно модель исполнения, без сетевого стека uvicorn.
+
+Использование:
+    python bench_async.py [--concurrency 64] [--duration 10] [--limit 20]
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+from app.db import Base, engine, async_engine, SessionLocal
+from app.routers import products
+from app import models, schemas
+
+
+def get_sync_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def build_sync_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/products/", response_model=list[schemas.Product])
+    def list_products(limit: int = 100, db: Session = Depends(get_sync_db)):
+        return (
+            db.execute(
+                select(models.Product)
+                .options(joinedload(models.Product.seller))
+                .order_by(models.Product.created_at.desc(), models.Product.id.desc())
+                .limit(limit)
+            )
+            .scalars()
+            .all()
+        )
+
+    return app
+
+
+def build_async_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    return app
+
+
+async def run_load(app: FastAPI, concurrency: int, duration: float, limit: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Прогрев: соединения пула и кэши планировщика
+        for _ in range(concurrency):
+            await client.get("/products/", params={"limit": limit})
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get("/products/", params={"limit": limit})
+                if response.status_code != 200:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "errors": errors,
+    }
+
+
+def report(label: str, result: dict):
+    print(
+        f"{label:<6} {result['rps']:9.1f} req/s   "
+        f"p50 {result['p50']:7.2f} ms   p95 {result['p95']:7.2f} ms   "
+        f"ошибок {result['errors']}"
+    )
+
+
+async def main_async(args):
+    sync_result = await run_load(build_sync_app(), args.concurrency, args.duration, args.limit)
+    report("sync", sync_result)
+    async_result = await run_load(build_async_app(), args.concurrency, args.duration, args.limit)
+    report("async", async_result)
+    await async_engine.dispose()
+    print(f"\nasync / sync: x{async_result['rps'] / sync_result['rps']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Бенчмарк рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Конкурентность {args.concurrency}, {args.duration:.0f} с на вариант, limit={args.limit}\n")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: сжатие страниц каталога — CPU против сэкономленных байт
+
+Собирает реальные ответы GET /products/ (crud.list_products + orjson, как
+в роутере) для страниц разного размера и сжимает их gzip и brotli с разными
+уровнями. Для каждого варианта печатает размер, долю от исходного и время
+сжатия одной страницы — по этим цифрам выбираются COMPRESSION_GZIP_LEVEL,
+COMPRESSION_BROTLI_QUALITY и COMPRESSION_MIN_SIZE.
+
+По умолчанию товары генерируются во временной SQLite-базе; с --use-env-db
+страницы берутся из базы DATABASE_URL (без добавления товаров).
+
+Использование:
+    python bench_compression.py [--products 500] [--iterations 200] [--use-env-db]
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+if "--use-env-db" not in sys.argv:
+    # Отдельная временная база, чтобы не трогать рабочую
+    _db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+else:
+    _db_file = None
+
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+from sqlalchemy import insert
+
+from app.db import Base, engine, async_engine, AsyncSessionLocal
+from app.compression import _Compressor, brotli
+from app import crud, models, schemas
+
+PRODUCT_FIELDS = tuple(schemas.Product.__fields__)
+PAGE_SIZES = [20, 50, 100]
+GZIP_LEVELS = [1, 4, 6, 9]
+BROTLI_QUALITIES = [1, 4, 6, 11]
+
+TITLES = ["Куртка", "Джинсы", "Платье", "Кроссовки", "Свитер", "Рубашка", "Пальто", "Сумка", "Шарф", "Ботинки"]
+ADJECTIVES = ["джинсовая", "винтажная", "оверсайз", "летняя", "тёплая", "кожаная", "льняная", "шерстяная"]
+BRANDS = ["Zara", "H&M", "Levi's", "Nike", "Adidas", "Uniqlo", "Mango", "без бренда"]
+DESCRIPTIONS = [
+    "Носили один сезон, без дефектов.",
+    "Маломерит на размер, подойдёт на {size}.",
+    "Есть небольшая затяжка на рукаве, на фото видно.",
+    "Покупали в {brand}, бирки сохранились.",
+    "Отдам в хорошие руки, самовывоз у метро.",
+]
+SIZES = ["XS", "S", "M", "L", "XL"]
+COLORS = ["Черный", "Белый", "Синий", "Зеленый", "Красный", "Бежевый"]
+
+
+async def seed(count: int):
+    async with AsyncSessionLocal() as db:
+        sellers = [
+            await crud.get_or_create_user(db, telegram_id=f"bench-{i}", username=f"seller_{i}", contact=f"+7999{i:07d}")
+            for i in range(50)
+        ]
+        now = datetime.utcnow()
+        rows = []
+        for i in range(count):
+            size, brand = random.choice(SIZES), random.choice(BRANDS)
+            description = " ".join(
+                random.sample(DESCRIPTIONS, k=random.randint(1, 3))
+            ).format(size=size, brand=brand)
+            image_key = models.generate_uuid()
+            rows.append({
+                "id": models.generate_uuid(),
+                "seller_id": random.choice(sellers).id,
+                "title": f"{random.choice(TITLES)} {random.choice(ADJECTIVES)} {brand}",
+                "description": description,
+                "price": random.randint(3, 300) * 50,
+                "image_key": image_key,
+                "image_url": f"/media/download/{image_key}",
+                "size": size,
+                "color": random.choice(COLORS),
+                "gender": random.choice(["Мужская", "Женская", "Унисекс"]),
+                "condition": random.choice(["Новое", "Как новое", "Хорошее"]),
+                "section": random.choice(["market", "swop", "charity"]),
+                "created_at": now - timedelta(minutes=i),
+            })
+        for start in range(0, len(rows), 500):
+            await db.execute(insert(models.Product).values(rows[start:start + 500]))
+        await db.commit()
+
+
+async def load_pages() -> dict:
+    pages = {}
+    async with AsyncSessionLocal() as db:
+        for limit in PAGE_SIZES:
+            rows = await crud.list_products(db, limit=limit)
+            pages[limit] = orjson.dumps([dict(zip(PRODUCT_FIELDS, row)) for row in rows])
+    await async_engine.dispose()
+    return pages
+
+
+def measure(body: bytes, encoding: str, level: int, iterations: int) -> tuple[int, float]:
+    times = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        compressed = _Compressor(encoding, gzip_level=level, brotli_quality=level).compress(body, final=True)
+        times.append(time.perf_counter() - started)
+    times.sort()
+    return len(compressed), times[len(times) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=500, help="сколько товаров сгенерировать")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--use-env-db", action="store_true", help="брать страницы из базы DATABASE_URL")
+    args = parser.parse_args()
+
+    variants = [("gzip", level) for level in GZIP_LEVELS]
+    if brotli is not None:
+        variants += [("br", quality) for quality in BROTLI_QUALITIES]
+    else:
+        print("⚠️  Пакет brotli не установлен, сравнивается только gzip\n")
+
+    try:
+        if _db_file is not None:
+            Base.metadata.create_all(bind=engine)
+            asyncio.run(seed(args.products))
+        pages = asyncio.run(load_pages())
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+    for limit, body in pages.items():
+        print(f"Страница {limit} товаров: {len(body)} байт JSON")
+        for encoding, level in variants:
+            # Высокие уровни brotli медленные — им хватит меньшего числа повторов
+            iterations = max(args.iterations // (20 if level >= 10 else 1), 5)
+            size, ms = measure(body, encoding, level, iterations)
+            saved = len(body) - size
+            print(
+                f"   {encoding:<4} {level:>2}   {size:7d} байт ({size / len(body):6.1%})   "
+                f"{ms:7.3f} ms   {saved / 1024 / ms if ms else 0:8.1f} КБ сэкономлено на 1 ms CPU"
+            )
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: производные картинок (thumb/card/full в WebP и JPEG)
+
+Для каждой исходной фотографии строит производные той же функцией, что и
+POST /media/upload (images.build_derivatives), и печатает:
+- размер каждой производной и долю от оригинала;
+- сколько байт экономит сетка каталога, если карточки грузят ?size=card
+  вместо оригиналов;
+- время обработки одной фотографии и пропускную способность пула процессов
+  против последовательной обработки.
+
+По умолчанию используются синтетические «фото» размером с кадр телефона;
+с --images берутся реальные JPEG/PNG из каталога. MinIO не нужен.
+
+Использование:
+    python bench_image_derivatives.py [--photos 8] [--images ./photos] [--grid 24]
+"""
+import sys
+import os
+import io
+import time
+import argparse
+import statistics
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+
+from app.services import images
+
+
+def synthetic_photo(seed: int, width: int = 3024, height: int = 4032) -> bytes:
+    """Градиент с «текстурой»: сжимается JPEG примерно как настоящая фотография.
+
+    Шум генерируется в низком разрешении и растягивается: мелкие детали,
+    как у ткани на фото, а не пиксельный шум, который не сжимается вовсе.
+    """
+    noise = [
+        Image.effect_noise((width // 6, height // 6), 30 + seed % 20)
+        .resize((width, height), Image.Resampling.BICUBIC)
+        for _ in range(3)
+    ]
+    gradient = Image.linear_gradient("L").resize((width, height))
+    channels = [Image.blend(gradient.rotate(90 * (i + seed)), n, 0.5) for i, n in enumerate(noise)]
+    out = io.BytesIO()
+    Image.merge("RGB", channels).save(out, "JPEG", quality=92)
+    return out.getvalue()
+
+
+def load_photos(args) -> list[bytes]:
+    if args.images:
+        names = sorted(
+            name for name in os.listdir(args.images)
+            if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp"))
+        )
+        photos = []
+        for name in names[:args.photos]:
+            with open(os.path.join(args.images, name), "rb") as f:
+                photos.append(f.read())
+        return photos
+    return [synthetic_photo(i) for i in range(args.photos)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--photos", type=int, default=8, help="сколько фотографий обработать")
+    parser.add_argument("--images", help="каталог с реальными фотографиями")
+    parser.add_argument("--grid", type=int, default=24, help="карточек на странице каталога")
+    args = parser.parse_args()
+
+    print("📷 Подготовка фотографий...")
+    photos = load_photos(args)
+    if not photos:
+        print("❌ Нет фотографий")
+        sys.exit(1)
+    original = statistics.mean(len(p) for p in photos)
+    print(f"   {len(photos)} шт., в среднем {original / 1024:.0f} КБ\n")
+
+    # Последовательно в текущем процессе: время на одну фотографию
+    started = time.perf_counter()
+    results = [images.build_derivatives(photo) for photo in photos]
+    serial = time.perf_counter() - started
+
+    print(f"{'производная':<14} {'средний размер':>15} {'от оригинала':>13}")
+    sizes = {}
+    for key in results[0]:
+        sizes[key] = statistics.mean(len(r[key]) for r in results)
+        size, fmt = key
+        print(f"{size + ' ' + fmt:<14} {sizes[key] / 1024:>12.1f} КБ {sizes[key] / original:>12.2%}")
+
+    print(f"\n🧮 Сетка каталога из {args.grid} карточек:")
+    grid_original = original * args.grid
+    for fmt in images.DERIVATIVE_FORMATS:
+        grid = sizes[("card", fmt)] * args.grid
+        print(
+            f"   card {fmt:<5} {grid / 2**20:6.2f} МБ вместо {grid_original / 2**20:.2f} МБ "
+            f"(экономия {(grid_original - grid) / 2**20:.2f} МБ, {1 - grid / grid_original:.1%})"
+        )
+
+    # Пул процессов: так производные строятся при загрузке
+    pool = images.pool()
+    list(pool.map(images.build_derivatives, photos[:1]))  # запуск воркеров
+    started = time.perf_counter()
+    list(pool.map(images.build_derivatives, photos))
+    parallel = time.perf_counter() - started
+    images.shutdown()
+
+    print(f"\n⏱  Обработка {len(photos)} фотографий:")
+    print(f"   последовательно: {serial:6.2f} с ({serial / len(photos) * 1000:.0f} мс на фото)")
+    print(f"   пул процессов:   {parallel:6.2f} с (воркеров: {images.IMAGE_WORKERS or os.cpu_count()}, ускорение ×{serial / parallel:.1f})")
+    print("\n✨ Готово. Размеры производных задаются images.DERIVATIVE_SIZES,")
+    print("   число воркеров — IMAGE_WORKERS.")
+
+
+if __name__ == "__main__":
+    main()
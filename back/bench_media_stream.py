@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: прокси картинок /media/download — буферизация против стриминга
+
+Загружает в MinIO тестовый объект и скачивает его параллельно через
+прежнюю схему (весь объект читается в память, затем BytesIO) и через
+текущий download_image, который отдаёт тело кусками по мере чтения из MinIO.
+(StreamingResponse итерирует BytesIO по строкам, поэтому прежняя схема
+ещё и дробила двоичные данные на тысячи мелких кусков.)
+Для каждой схемы печатает пиковую память Python-процесса (tracemalloc),
+время до первого байта (медиана и максимум) и общее время.
+
+Запросы идут прямо в ASGI-приложение без сети, поэтому цифры отражают
+работу backend, а не клиента. Нужен доступный MinIO (переменные MINIO_*).
+
+Использование:
+    python bench_media_stream.py [--size-mb 2] [--concurrency 10]
+"""
+import sys
+import os
+import io
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+import tracemalloc
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.routers import media
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(media.router, prefix="/media")
+
+    @app.get("/buffered/{image_key}")
+    async def buffered(image_key: str):
+        # Прежняя реализация: объект целиком в памяти до отправки первого байта
+        image_bytes, content_length = await run_in_threadpool(media.storage.get_object, image_key)
+        return StreamingResponse(
+            io.BytesIO(image_bytes),
+            media_type="image/jpeg",
+            headers={"Content-Length": str(content_length)},
+        )
+
+    return app
+
+
+async def download(app: FastAPI, path: str) -> tuple[float, int]:
+    """GET path через ASGI: (секунд до первого куска тела, байт получено)"""
+    started = time.perf_counter()
+    first_byte = None
+    received = 0
+    status = None
+
+    request_sent = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # Тело запроса пустое; дальше клиент «висит» на соединении до конца ответа
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal first_byte, received, status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            if body and first_byte is None:
+                first_byte = time.perf_counter() - started
+            received += len(body)
+            if not message.get("more_body", False):
+                finished.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    await app(scope, receive, send)
+    if status != 200:
+        raise RuntimeError(f"{path}: HTTP {status}")
+    return first_byte or 0.0, received
+
+
+async def run(app: FastAPI, path: str, concurrency: int, size: int) -> dict:
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(download(app, path) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+
+    if any(received != size for _, received in results):
+        raise RuntimeError(f"{path}: получено не всё тело")
+    ttfb = [first_byte for first_byte, _ in results]
+    return {
+        "peak_mb": peak / 2**20,
+        "ttfb_median_ms": statistics.median(ttfb) * 1000,
+        "ttfb_max_ms": max(ttfb) * 1000,
+        "total_s": elapsed,
+    }
+
+
+async def bench(args):
+    size = int(args.size_mb * 2**20)
+    key = f"bench-{uuid.uuid4().hex}.jpg"
+    storage = media.storage
+    print(f"📦 Загрузка тестового объекта {args.size_mb} МБ в MinIO...")
+    storage.client.put_object(storage.bucket, key, io.BytesIO(os.urandom(size)), size, content_type="image/jpeg")
+
+    app = build_app()
+    tracemalloc.start()
+    try:
+        print(f"⏱  {args.concurrency} параллельных скачиваний:\n")
+        print(f"{'схема':<12} {'пик памяти':>12} {'TTFB мед.':>11} {'TTFB макс.':>11} {'всего':>9}")
+        for label, path in (("buffered", f"/buffered/{key}"), ("streaming", f"/media/download/{key}")):
+            result = await run(app, path, args.concurrency, size)
+            print(
+                f"{label:<12} {result['peak_mb']:>9.1f} МБ {result['ttfb_median_ms']:>8.1f} мс "
+                f"{result['ttfb_max_ms']:>8.1f} мс {result['total_s']:>7.2f} с"
+            )
+    finally:
+        tracemalloc.stop()
+        storage.client.remove_object(storage.bucket, key)
+
+    print("\n✨ Готово. Пик памяти стриминга не зависит от размера объекта:")
+    print("   не больше concurrency × MEDIA_CHUNK_SIZE плюс буферы urllib3.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=2, help="размер тестового объекта, МБ")
+    parser.add_argument("--concurrency", type=int, default=10, help="параллельных скачиваний")
+    args = parser.parse_args()
+    asyncio.run(bench(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк: сериализация страницы каталога
+
+Сравнивает два способа собрать ответ GET /products/ для одной страницы:
+  - orm: прежний путь — ORM-объекты Product с joinedload(seller),
+    словари по полям schemas.Product, jsonable_encoder и json.dumps;
+  - rows: текущий crud.list_products — только нужные колонки строками
+    (без identity map) и orjson.
+Время меряется отдельно для выборки и для кодирования в JSON. По умолчанию
+используется временная SQLite-база, чтобы результат отражал CPU приложения,
+а не сеть до PostgreSQL; с --use-env-db берётся DATABASE_URL.
+
+Использование:
+    python bench_serialization.py [--products 2000] [--limit 100] [--iterations 200] [--use-env-db]
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import tempfile
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+if "--use-env-db" not in sys.argv:
+    # Отдельная временная база, чтобы не трогать рабочую
+    _db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+    os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+else:
+    _db_file = None
+
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+from sqlalchemy.orm import joinedload
+
+from app.db import Base, engine, async_engine, AsyncSessionLocal
+from app import crud, models, schemas
+
+PRODUCT_FIELDS = tuple(schemas.Product.__fields__)
+
+
+async def seed(count: int):
+    async with AsyncSessionLocal() as db:
+        sellers = [
+            await crud.get_or_create_user(db, telegram_id=f"bench-{i}", username=f"bench_{i}", contact="+7000")
+            for i in range(20)
+        ]
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": models.generate_uuid(),
+                "seller_id": sellers[i % len(sellers)].id,
+                "title": f"Куртка джинсовая {i}",
+                "description": "Почти новая, носили один сезон. " * 3,
+                "price": 1000 + i,
+                "size": "M",
+                "color": "Синий",
+                "gender": "Унисекс",
+                "condition": "Как новое",
+                "section": "market",
+                "created_at": now - timedelta(seconds=i),
+            }
+            for i in range(count)
+        ]
+        for start in range(0, len(rows), 500):
+            await db.execute(insert(models.Product).values(rows[start:start + 500]))
+        await db.commit()
+
+
+async def orm_page(limit: int) -> tuple[float, float]:
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        result = await db.execute(
+            select(models.Product)
+            .options(joinedload(models.Product.seller))
+            .order_by(models.Product.created_at.desc(), models.Product.id.desc())
+            .limit(limit)
+        )
+        products = result.scalars().all()
+        fetched = time.perf_counter()
+        payload = []
+        for product in products:
+            data = {name: getattr(product, name) for name in PRODUCT_FIELDS}
+            if product.seller:
+                data["seller_username"] = data["seller_username"] or product.seller.username
+                data["seller_contact"] = data["seller_contact"] or product.seller.contact
+            payload.append(data)
+        json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return fetched - started, time.perf_counter() - fetched
+
+
+async def rows_page(limit: int) -> tuple[float, float]:
+    async with AsyncSessionLocal() as db:
+        started = time.perf_counter()
+        rows = await crud.list_products(db, limit=limit)
+        fetched = time.perf_counter()
+        orjson.dumps([dict(zip(PRODUCT_FIELDS, row)) for row in rows])
+        return fetched - started, time.perf_counter() - fetched
+
+
+async def measure(page, limit: int, iterations: int) -> dict:
+    # Прогрев: соединения, кэш компиляции SQL
+    for _ in range(10):
+        await page(limit)
+    fetch, encode = [], []
+    for _ in range(iterations):
+        fetch_time, encode_time = await page(limit)
+        fetch.append(fetch_time)
+        encode.append(encode_time)
+    fetch.sort()
+    encode.sort()
+    return {
+        "fetch": fetch[len(fetch) // 2] * 1000,
+        "encode": encode[len(encode) // 2] * 1000,
+    }
+
+
+def report(label: str, result: dict):
+    total = result["fetch"] + result["encode"]
+    print(
+        f"{label:<5} выборка {result['fetch']:7.3f} ms   JSON {result['encode']:7.3f} ms   "
+        f"итого {total:7.3f} ms (медианы)"
+    )
+
+
+async def main_async(args):
+    if args.products:
+        await seed(args.products)
+    orm = await measure(orm_page, args.limit, args.iterations)
+    report("orm", orm)
+    rows = await measure(rows_page, args.limit, args.iterations)
+    report("rows", rows)
+    await async_engine.dispose()
+    print(
+        f"\nrows / orm: выборка x{orm['fetch'] / rows['fetch']:.2f}, "
+        f"JSON x{orm['encode'] / rows['encode']:.2f}, "
+        f"итого x{(orm['fetch'] + orm['encode']) / (rows['fetch'] + rows['encode']):.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=2000, help="сколько товаров добавить перед замером")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--use-env-db", action="store_true", help="мерить на базе из DATABASE_URL")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Страница {args.limit} товаров, {args.iterations} повторов на вариант\n")
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        if _db_file is not None:
+            os.unlink(_db_file.name)
+
+
+if __name__ == "__main__":
+    main()
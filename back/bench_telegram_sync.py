@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк: синхронизация пользователя Telegram, POST /users/telegram/{telegram_id}
+
+Бот вызывает этот эндпоинт на каждое обновление (UserMiddleware), поэтому он
+самый горячий в backend. Сравниваются два варианта:
+  - legacy: прежняя схема — SELECT, UPDATE + refresh или INSERT, откат и
+    повторный SELECT при гонке;
+  - upsert: текущий crud.get_or_create_user — один INSERT ... ON CONFLICT.
+Нагрузка подаётся in-process через ASGI-транспорт httpx: конкурентные
+запросы по пулу telegram_id, часть запросов меняет username.
+
+Использование:
+    python bench_telegram_sync.py [--concurrency 64] [--duration 10] [--users 500]
+"""
+import sys
+import os
+import time
+import random
+import asyncio
+import argparse
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db import Base, engine, async_engine
+from app.dependencies import get_db
+from app.routers import users
+from app import models, schemas
+
+# Доля запросов, в которых пользователь сменил username
+RENAME_RATE = 0.05
+
+
+def build_legacy_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/users/telegram/{telegram_id}", response_model=schemas.User)
+    async def get_or_create(telegram_id: str, data: schemas.UserCreate | None = None, db: AsyncSession = Depends(get_db)):
+        username = data.username if data else None
+        contact = data.contact if data else None
+        result = await db.execute(select(models.User).where(models.User.telegram_id == telegram_id))
+        user = result.scalars().first()
+        if user:
+            updated = False
+            if username and user.username != username:
+                user.username = username
+                updated = True
+            if contact and user.contact != contact:
+                user.contact = contact
+                updated = True
+            if updated:
+                await db.commit()
+                await db.refresh(user)
+            return user
+
+        user = models.User(username=username, telegram_id=telegram_id, contact=contact)
+        try:
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+            return user
+        except Exception:
+            await db.rollback()
+            result = await db.execute(select(models.User).where(models.User.telegram_id == telegram_id))
+            return result.scalars().first()
+
+    return app
+
+
+def build_upsert_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(users.router, prefix="/users")
+    return app
+
+
+async def run_load(app: FastAPI, label: str, concurrency: int, duration: float, user_count: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    errors = 0
+    statements = 0
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        nonlocal statements
+        statements += 1
+
+    def payload(telegram_id: int) -> dict:
+        suffix = random.randint(0, 9) if random.random() < RENAME_RATE else 0
+        return {"username": f"bench_{label}_{telegram_id}_{suffix}", "contact": None}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Прогрев: пользователи уже существуют, как в боте в установившемся режиме
+        for telegram_id in range(user_count):
+            await client.post(f"/users/telegram/{label}-{telegram_id}", json=payload(telegram_id))
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                telegram_id = random.randrange(user_count)
+                start = time.perf_counter()
+                response = await client.post(f"/users/telegram/{label}-{telegram_id}", json=payload(telegram_id))
+                if response.status_code != 200:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            deadline = time.perf_counter() + duration
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / elapsed,
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "queries": statements / len(latencies),
+        "errors": errors,
+    }
+
+
+def report(label: str, result: dict):
+    print(
+        f"{label:<7} {result['rps']:9.1f} req/s   "
+        f"p50 {result['p50']:7.2f} ms   p95 {result['p95']:7.2f} ms   "
+        f"{result['queries']:.2f} SQL/запрос   ошибок {result['errors']}"
+    )
+
+
+async def main_async(args):
+    legacy = await run_load(build_legacy_app(), "legacy", args.concurrency, args.duration, args.users)
+    report("legacy", legacy)
+    upsert = await run_load(build_upsert_app(), "upsert", args.concurrency, args.duration, args.users)
+    report("upsert", upsert)
+    await async_engine.dispose()
+    print(f"\nupsert / legacy: x{upsert['rps'] / legacy['rps']:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=500, help="сколько разных telegram_id в нагрузке")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Бенчмарк рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        sys.exit(1)
+
+    Base.metadata.create_all(bind=engine)
+    print(f"Конкурентность {args.concurrency}, {args.duration:.0f} с на вариант, пользователей {args.users}\n")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
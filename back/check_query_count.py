@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Проверка числа SQL-запросов на запрос к API
+
+Поднимает роутеры на временной SQLite-базе, наполняет её товарами разных
+продавцов и считает SQL-запросы, которые выполняет каждый эндпоинт.
+Отдельно проверяет, что каждая create-функция crud — один INSERT без
+SELECT-а на refresh. Если эндпоинт или запись превышает бюджет (например,
+вернулся N+1 по продавцам), скрипт завершается с кодом 1.
+
+Использование:
+    python check_query_count.py
+"""
+import sys
+import os
+import tempfile
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+# Отдельная временная база, чтобы не трогать рабочую
+_db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+
+import asyncio
+from contextlib import contextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.db import Base, engine, async_engine, AsyncSessionLocal
+from app.routers import products
+from app import crud, schemas
+
+PRODUCTS_COUNT = 20
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    # API работает через async-движок, события вешаются на его sync-ядро
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def seed() -> str:
+    async with AsyncSessionLocal() as db:
+        product_id = None
+        for i in range(PRODUCTS_COUNT):
+            seller = await crud.get_or_create_user(db, telegram_id=f"seller-{i}", username=f"seller_{i}")
+            product = await crud.create_product(
+                db,
+                schemas.ProductCreate(title=f"Item {i}", price=100 + i, size="M"),
+                seller_id=seller.id,
+            )
+            product_id = product.id
+    await async_engine.dispose()
+    return product_id
+
+
+def check(client: TestClient, label: str, url: str, budget: int, **params) -> bool:
+    with count_queries() as statements:
+        response = client.get(url, params=params)
+    response.raise_for_status()
+    return report(label, statements, budget)
+
+
+async def check_writes(product_id: str) -> list:
+    """Каждая create-функция — ровно один INSERT (значения по умолчанию через RETURNING)"""
+    results = []
+    async with AsyncSessionLocal() as db:
+        # Справочник категорий читается из кэша; прогреваем, чтобы мерить только запись
+        await crud.categories_snapshot(db)
+        writes = [
+            ("crud.create_user", lambda: crud.create_user(db, schemas.UserCreate(username="writer", telegram_id="writer"))),
+            ("crud.create_category", lambda: crud.create_category(db, "Аксессуары")),
+            ("crud.create_product", lambda: crud.create_product(db, schemas.ProductCreate(title="New", price=1), seller_id=user.id)),
+            ("crud.create_message", lambda: crud.create_message(db, schemas.MessageCreate(product_id=product_id, sender_id=user.id, text="Hi"))),
+            ("crud.create_order", lambda: crud.create_order(db, schemas.OrderCreate(buyer_id=user.id, product_id=product_id))),
+        ]
+        user = None
+        for label, write in writes:
+            with count_queries() as statements:
+                created = await write()
+            user = user or created
+            # Ответ собирается из объекта без обращений к БД
+            assert created.id is not None
+            results.append(report(label, statements, budget=1))
+    await async_engine.dispose()
+    return results
+
+
+def report(label: str, statements: list, budget: int) -> bool:
+    ok = len(statements) <= budget
+    mark = "✅" if ok else "❌"
+    print(f"{mark} {label:<35} {len(statements)} запрос(ов), бюджет {budget}")
+    if not ok:
+        for statement in statements:
+            print("     ", " ".join(statement.split())[:120])
+    return ok
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    product_id = asyncio.run(seed())
+
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    client = TestClient(app)
+    results = [
+        check(client, "GET /products/", "/products/", budget=1, limit=100),
+        check(client, "GET /products/ (фильтры)", "/products/", budget=1, size="M", section="market"),
+        check(client, "GET /products/{id}", f"/products/{product_id}", budget=1),
+    ]
+    results += asyncio.run(check_writes(product_id))
+
+    os.unlink(_db_file.name)
+    if not all(results):
+        print("\n❌ Превышен бюджет SQL-запросов")
+        sys.exit(1)
+    print("\n✨ Все эндпоинты укладываются в бюджет SQL-запросов")
+
+
+if __name__ == "__main__":
+    main()
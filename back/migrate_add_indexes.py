@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Скрипт миграции БД: индексы под фильтры каталога
+
+Создаёт индексы, объявленные в app/models.py, на уже существующей базе
+(Base.metadata.create_all не трогает таблицы, которые уже есть).
+Индексы строятся через CREATE INDEX CONCURRENTLY IF NOT EXISTS,
+поэтому таблицы не блокируются на запись и скрипт можно запускать повторно.
+
+Использование:
+    python migrate_add_indexes.py
+"""
+import sys
+import os
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy.schema import CreateIndex
+
+from app.db import engine
+from app.models import Product, Message, Order
+
+
+TABLES = [Product.__table__, Message.__table__, Order.__table__]
+
+
+def migrate():
+    if engine.dialect.name != "postgresql":
+        print("❌ Скрипт рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        return
+
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in TABLES:
+            for index in sorted(table.indexes, key=lambda i: i.name):
+                index.dialect_options["postgresql"]["concurrently"] = True
+                print(f"🔨 {table.name}: {index.name}...")
+                conn.execute(CreateIndex(index, if_not_exists=True))
+            conn.exec_driver_sql(f"ANALYZE {table.name}")
+            print(f"✅ {table.name}: индексы созданы, статистика обновлена")
+
+    print("\n✨ Миграция завершена!")
+    print("Если какой-то CREATE INDEX CONCURRENTLY прервался, удалите")
+    print("невалидный индекс (DROP INDEX CONCURRENTLY ...) и запустите скрипт снова.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Скрипт миграции БД: полнотекстовый поиск и подсказки по товарам
+
+Добавляет в products generated-колонку search_vector (tsvector по title и
+description, конфигурации russian + simple) и GIN-индекс по ней, а также
+расширение pg_trgm и триграммный GIN-индекс по title для /products/suggest.
+Новые базы получают их сами при Base.metadata.create_all.
+
+ВНИМАНИЕ: добавление STORED generated-колонки переписывает таблицу products
+под эксклюзивной блокировкой. Запускайте в окно низкой нагрузки.
+Индекс строится CONCURRENTLY и запись не блокирует.
+
+Пока миграция не применена, запустите backend с SEARCH_BACKEND=ilike.
+
+Использование:
+    python migrate_add_search.py
+"""
+import sys
+import os
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from app.db import engine
+from app.models import (
+    ADD_SEARCH_VECTOR_SQL,
+    SEARCH_VECTOR_INDEX_SQL,
+    TRGM_EXTENSION_SQL,
+    TITLE_TRGM_INDEX_SQL,
+)
+
+
+def migrate():
+    if engine.dialect.name != "postgresql":
+        print("❌ Скрипт рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        return
+
+    print("🔨 Добавление колонки search_vector...")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(ADD_SEARCH_VECTOR_SQL)
+        conn.exec_driver_sql(TRGM_EXTENSION_SQL)
+    print("✅ Колонка добавлена, pg_trgm подключён")
+
+    print("\n🔨 Построение GIN-индексов...")
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql(SEARCH_VECTOR_INDEX_SQL.format(concurrently="CONCURRENTLY"))
+        conn.exec_driver_sql(TITLE_TRGM_INDEX_SQL.format(concurrently="CONCURRENTLY"))
+        conn.exec_driver_sql("ANALYZE products")
+    print("✅ Индексы ix_products_search_vector и ix_products_title_trgm созданы")
+
+    print("\n✨ Миграция завершена! Поиск переключится на полнотекстовый")
+    print("при SEARCH_BACKEND=auto (по умолчанию) после перезапуска backend.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -5,7 +5,8 @@
 ВНИМАНИЕ: Этот скрипт пересоздаст все таблицы с нуля!
 Все существующие данные будут потеряны.
 
-Для production используйте Alembic для безопасной миграции.
+Для production используйте Alembic для безопасной миграции; перевод
+существующей базы на нативные uuid без потери данных — migrate_uuid_native.py.
 
 Использование:
     python migrate_to_uuid.py
@@ -39,10 +40,10 @@ def migrate():
     
     print("\n✨ Миграция завершена!")
     print("\nСтруктура таблиц:")
-    print("  - users: id (String(32) UUID)")
-    print("  - products: id (String(32) UUID), seller_id (String(32))")
-    print("  - messages: id (String(32) UUID), product_id, sender_id")
-    print("  - orders: id (String(32) UUID), buyer_id, product_id")
+    print("  - users: id (uuid, UUIDv7)")
+    print("  - products: id (uuid, UUIDv7), seller_id (uuid)")
+    print("  - messages: id (uuid, UUIDv7), product_id, sender_id")
+    print("  - orders: id (uuid, UUIDv7), buyer_id, product_id")
     print("  - categories: id (Integer) - не изменилась")
 
 
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Скрипт миграции БД: уникальный telegram_id для upsert пользователей
+
+crud.get_or_create_user выполняет INSERT ... ON CONFLICT (telegram_id),
+которому нужен уникальный индекс ux_users_telegram_id. Прежний код
+(SELECT, затем INSERT) при гонке мог создать дубли одного telegram_id,
+поэтому скрипт:
+1. Склеивает дубли: товары, сообщения и заказы переносятся на пользователя
+   с наибольшим числом товаров, остальные записи удаляются
+2. Строит уникальный индекс через CREATE UNIQUE INDEX CONCURRENTLY
+
+Скрипт можно запускать повторно.
+
+Использование:
+    python migrate_user_upsert.py
+"""
+import sys
+import os
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from app.db import engine
+from app.models import User
+
+# Ссылки на users.id, которые нужно перенести при склейке дублей
+USER_REFERENCES = [
+    ("products", "seller_id"),
+    ("messages", "sender_id"),
+    ("orders", "buyer_id"),
+]
+
+DUPLICATES_SQL = text("""
+    SELECT u.telegram_id, u.id
+    FROM users u
+    LEFT JOIN products p ON p.seller_id = u.id
+    WHERE u.telegram_id IN (
+        SELECT telegram_id FROM users
+        WHERE telegram_id IS NOT NULL
+        GROUP BY telegram_id HAVING count(*) > 1
+    )
+    GROUP BY u.telegram_id, u.id
+    ORDER BY u.telegram_id, count(p.id) DESC, u.id
+""")
+
+
+def merge_duplicates(conn) -> int:
+    groups = {}
+    for telegram_id, user_id in conn.execute(DUPLICATES_SQL):
+        groups.setdefault(telegram_id, []).append(user_id)
+
+    merged = 0
+    for telegram_id, (keeper, *duplicates) in groups.items():
+        for table, column in USER_REFERENCES:
+            conn.execute(
+                text(f"UPDATE {table} SET {column} = :keeper WHERE {column} = ANY(:duplicates)"),
+                {"keeper": keeper, "duplicates": duplicates},
+            )
+        conn.execute(text("DELETE FROM users WHERE id = ANY(:duplicates)"), {"duplicates": duplicates})
+        merged += len(duplicates)
+        print(f"   telegram_id={telegram_id}: {len(duplicates)} дубл(ей) → {keeper}")
+    return merged
+
+
+def migrate():
+    if engine.dialect.name != "postgresql":
+        print("❌ Скрипт рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        return
+
+    print("🔨 Поиск дублей telegram_id...")
+    with engine.begin() as conn:
+        merged = merge_duplicates(conn)
+    print(f"✅ Склеено записей: {merged}")
+
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    index = next(i for i in User.__table__.indexes if i.name == "ux_users_telegram_id")
+    index.dialect_options["postgresql"]["concurrently"] = True
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print(f"🔨 users: {index.name}...")
+        conn.execute(CreateIndex(index, if_not_exists=True))
+        conn.exec_driver_sql("ANALYZE users")
+    print("✅ Уникальный индекс создан")
+
+    print("\n✨ Миграция завершена!")
+    print("Если CREATE UNIQUE INDEX CONCURRENTLY упал из-за новых дублей, удалите")
+    print("невалидный индекс (DROP INDEX CONCURRENTLY ux_users_telegram_id) и запустите скрипт снова.")
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Скрипт миграции БД: ключи String(32) → нативный uuid (PostgreSQL), без простоя
+
+В отличие от migrate_to_uuid.py данные сохраняются, а таблицы остаются
+доступными на чтение и запись почти всё время. Миграция идёт в два этапа:
+
+prepare (можно прерывать и запускать повторно, работает под нагрузкой):
+1. К users, products, messages, orders добавляются теневые колонки
+   <колонка>_uuid для id и всех ссылок на пользователей/товары
+2. Триггер заполняет теневые колонки у каждой новой и изменённой строки
+3. Существующие строки конвертируются пачками (--batch), по транзакции
+   на пачку, с паузой --sleep между ними
+4. Через CREATE INDEX CONCURRENTLY строятся будущий первичный ключ и копии
+   всех индексов из app/models.py по теневым колонкам
+5. NOT NULL для будущих id проверяется CHECK ... NOT VALID + VALIDATE,
+   чтобы на этапе swap не сканировать таблицы под блокировкой
+
+swap (одна короткая транзакция с lock_timeout, выполнять одновременно
+с выкладкой новой версии backend — старая пишет id строками):
+6. Старые FK, первичные ключи и колонки удаляются, теневые переименовываются,
+   первичные ключи собираются из готовых индексов
+7. FK создаются NOT VALID и проверяются уже после транзакции (VALIDATE
+   не блокирует запись)
+
+Использование:
+    python migrate_uuid_native.py prepare [--batch 5000] [--sleep 0.05]
+    python migrate_uuid_native.py swap [--lock-timeout 5s]
+"""
+import sys
+import os
+import re
+import time
+import argparse
+
+# Добавляем путь к app для импорта
+sys.path.insert(0, os.path.dirname(__file__))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from app.db import engine
+from app.models import User, Product, Message, Order
+
+# Таблица → конвертируемые колонки (первая — первичный ключ)
+TABLES = {
+    "users": ["id"],
+    "products": ["id", "seller_id"],
+    "messages": ["id", "product_id", "sender_id"],
+    "orders": ["id", "buyer_id", "product_id"],
+}
+MODELS = {"users": User, "products": Product, "messages": Message, "orders": Order}
+
+# Внешние ключи после миграции: (таблица, колонка) → таблица, на чью id она ссылается
+REFERENCES = {
+    ("products", "seller_id"): "users",
+    ("messages", "product_id"): "products",
+    ("messages", "sender_id"): "users",
+    ("orders", "buyer_id"): "users",
+    ("orders", "product_id"): "products",
+}
+
+SHADOW = "{}_uuid"
+
+
+def shadow(column: str) -> str:
+    return SHADOW.format(column)
+
+
+def column_type(conn, table: str, column: str) -> str | None:
+    return conn.execute(
+        text("SELECT data_type FROM information_schema.columns WHERE table_name = :t AND column_name = :c"),
+        {"t": table, "c": column},
+    ).scalar()
+
+
+def constraint_exists(conn, name: str) -> bool:
+    return conn.execute(text("SELECT 1 FROM pg_constraint WHERE conname = :n"), {"n": name}).scalar() is not None
+
+
+def shadow_indexes(table: str) -> list:
+    """DDL копий индексов модели по теневым колонкам: (имя копии, исходное имя, DDL)"""
+    columns = TABLES[table]
+    pattern = re.compile(r"\b(" + "|".join(columns) + r")\b")
+    result = []
+    for index in sorted(MODELS[table].__table__.indexes, key=lambda i: i.name):
+        if not any(c.name in columns for c in index.columns):
+            continue
+        index.dialect_options["postgresql"]["concurrently"] = True
+        ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+        head, _, column_list = ddl.partition(f" ON {table} ")
+        name = f"{index.name}_uuid"
+        ddl = head.replace(index.name, name) + f" ON {table} " + pattern.sub(lambda m: shadow(m.group(1)), column_list)
+        result.append((name, index.name, ddl))
+    return result
+
+
+def prepare(args):
+    with engine.begin() as conn:
+        for table, columns in TABLES.items():
+            print(f"🔨 {table}: теневые колонки и триггер...")
+            for column in columns:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {shadow(column)} uuid")
+            assignments = "\n".join(f"    NEW.{shadow(c)} := NEW.{c}::uuid;" for c in columns)
+            conn.exec_driver_sql(f"""
+                CREATE OR REPLACE FUNCTION {table}_uuid_shadow() RETURNS trigger AS $$
+                BEGIN
+                {assignments}
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_uuid_shadow ON {table}")
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER {table}_uuid_shadow BEFORE INSERT OR UPDATE ON {table} "
+                f"FOR EACH ROW EXECUTE FUNCTION {table}_uuid_shadow()"
+            )
+    print("✅ Новые строки пишутся сразу в обе колонки\n")
+
+    for table, columns in TABLES.items():
+        backfill(table, columns, args.batch, args.sleep)
+
+    # CONCURRENTLY нельзя выполнять внутри транзакции
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in TABLES:
+            print(f"🔨 {table}: индексы по теневым колонкам...")
+            conn.exec_driver_sql(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {table}_pkey_uuid ON {table} ({shadow('id')})"
+            )
+            for name, _, ddl in shadow_indexes(table):
+                print(f"   {name}")
+                conn.exec_driver_sql(ddl)
+
+            check = f"{table}_id_uuid_not_null"
+            if not constraint_exists(conn, check):
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({shadow('id')} IS NOT NULL) NOT VALID"
+                )
+            conn.exec_driver_sql(f"ALTER TABLE {table} VALIDATE CONSTRAINT {check}")
+            conn.exec_driver_sql(f"ANALYZE {table}")
+            print(f"✅ {table}: готово к переключению")
+
+    print("\n✨ Подготовка завершена. Запустите «swap» вместе с выкладкой новой версии backend.")
+    print("Если CREATE INDEX CONCURRENTLY прервался, удалите невалидный индекс")
+    print("(DROP INDEX CONCURRENTLY ...) и запустите prepare снова.")
+
+
+def backfill(table: str, columns: list, batch: int, sleep: float):
+    """Конвертация существующих строк пачками по первичному ключу"""
+    assignments = ", ".join(f"{shadow(c)} = t.{c}::uuid" for c in columns)
+    # Граница следующей пачки считается в SQL, в той же сортировке, что и ORDER BY
+    statement = text(f"""
+        WITH batch AS (
+            SELECT id FROM {table} WHERE id > :last ORDER BY id LIMIT :batch
+        ), updated AS (
+            UPDATE {table} t SET {assignments}
+            FROM batch WHERE t.id = batch.id
+            RETURNING t.id
+        )
+        SELECT (SELECT count(*) FROM updated), (SELECT max(id) FROM batch)
+    """)
+    last, total = "", 0
+    while True:
+        with engine.begin() as conn:
+            count, batch_last = conn.execute(statement, {"last": last, "batch": batch}).one()
+        if not count:
+            break
+        last = batch_last
+        total += count
+        print(f"   {table}: {total} строк", end="\r")
+        time.sleep(sleep)
+    print(f"✅ {table}: сконвертировано {total} строк")
+
+
+def swap(args):
+    with engine.begin() as conn:
+        conn.exec_driver_sql(f"SET LOCAL lock_timeout = '{args.lock_timeout}'")
+        # Порядок блокировок одинаковый, чтобы не ловить взаимоблокировки
+        conn.exec_driver_sql("LOCK TABLE " + ", ".join(TABLES) + " IN ACCESS EXCLUSIVE MODE")
+
+        # Внешние ключи на старые колонки (имена берём из каталога)
+        foreign_keys = conn.execute(text("""
+            SELECT conrelid::regclass::text, conname FROM pg_constraint
+            WHERE contype = 'f' AND conrelid::regclass::text = ANY(:tables)
+              AND confrelid::regclass::text IN ('users', 'products')
+        """), {"tables": list(TABLES)}).all()
+        for table, name in foreign_keys:
+            conn.exec_driver_sql(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+
+        for table, columns in TABLES.items():
+            print(f"🔨 {table}: переключение на uuid...")
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {table}_uuid_shadow ON {table}")
+            conn.exec_driver_sql(f"DROP FUNCTION IF EXISTS {table}_uuid_shadow()")
+            conn.exec_driver_sql(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey")
+            for column in columns:
+                # Индексы по старой колонке удаляются вместе с ней
+                conn.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {column}")
+                conn.exec_driver_sql(f"ALTER TABLE {table} RENAME COLUMN {shadow(column)} TO {column}")
+            # Проверенный CHECK позволяет поставить NOT NULL без сканирования таблицы
+            conn.exec_driver_sql(f"ALTER TABLE {table} ALTER COLUMN id SET NOT NULL")
+            conn.exec_driver_sql(f"ALTER TABLE {table} DROP CONSTRAINT {table}_id_uuid_not_null")
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_pkey_uuid"
+            )
+            for name, original, _ in shadow_indexes(table):
+                conn.exec_driver_sql(f"ALTER INDEX {name} RENAME TO {original}")
+
+        for (table, column), target in REFERENCES.items():
+            conn.exec_driver_sql(
+                f"ALTER TABLE {table} ADD CONSTRAINT {table}_{column}_fkey "
+                f"FOREIGN KEY ({column}) REFERENCES {target} (id) NOT VALID"
+            )
+    print("✅ Таблицы переключены на uuid")
+
+    # Проверка FK идёт без блокировки записи
+    with engine.begin() as conn:
+        for table, column in REFERENCES:
+            print(f"🔨 Проверка {table}_{column}_fkey...")
+            conn.exec_driver_sql(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey")
+        for table in TABLES:
+            conn.exec_driver_sql(f"ANALYZE {table}")
+
+    print("\n✨ Миграция завершена! Запустите VACUUM для таблиц: после конвертации")
+    print("в них остались старые версии строк.")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stage", choices=["prepare", "swap"])
+    parser.add_argument("--batch", type=int, default=5000, help="строк в одной транзакции конвертации")
+    parser.add_argument("--sleep", type=float, default=0.05, help="пауза между пачками, с")
+    parser.add_argument("--lock-timeout", default="5s", help="сколько ждать блокировок на этапе swap")
+    args = parser.parse_args()
+
+    if engine.dialect.name != "postgresql":
+        print("❌ Скрипт рассчитан на PostgreSQL, текущая БД:", engine.dialect.name)
+        sys.exit(1)
+
+    with engine.connect() as conn:
+        if column_type(conn, "users", "id") == "uuid":
+            print("✅ Ключи уже нативные uuid, миграция не нужна")
+            return
+        if args.stage == "swap" and column_type(conn, "users", shadow("id")) is None:
+            print("❌ Сначала выполните этап prepare")
+            sys.exit(1)
+
+    if args.stage == "prepare":
+        prepare(args)
+    else:
+        swap(args)
+
+
+if __name__ == "__main__":
+    main()
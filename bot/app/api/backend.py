@@ -20,15 +20,19 @@ class BackendAPI:
             response.raise_for_status()
             return response.json()
 
-    async def list_products(self, section: str = "market", limit: int = 10) -> list:
+    async def list_products(self, section: str = "market", limit: int = 10, fields: list[str] | None = None) -> list:
         """
         Получить список товаров из backend
+
+        fields — только нужные поля товара (backend не читает остальные колонки)
         """
         url = f"{self.base_url}/products/"
         params = {
             "section": section,
             "limit": limit,
         }
+        if fields:
+            params["fields"] = ",".join(fields)
 
         logger.info("Fetching products: section=%s limit=%s", section, limit)
 
@@ -11,6 +11,9 @@ from app.keyboards.common import main_menu
 router = Router()
 api = BackendAPI()
 
+# Поля товара, которые показывает список покупок
+BUY_LIST_FIELDS = ["title", "price", "description", "seller_username", "seller_contact"]
+
 
 @router.message(F.text == "🛍 Купить")
 async def buy_handler(message: Message, state: FSMContext, user_id: int):
@@ -23,7 +26,7 @@ async def buy_handler(message: Message, state: FSMContext, user_id: int):
         logger.info("Buy action triggered: user_id=%s", user_id)
         
         # Получить товары из backend
-        products = await api.list_products(section="market")
+        products = await api.list_products(section="market", fields=BUY_LIST_FIELDS)
         
         if not products:
             await message.answer(
@@ -4,6 +4,7 @@ Test script to validate image proxy architecture.
 Verifies: Upload → MinIO → Download via proxy
 """
 
+import sys
 import httpx
 import asyncio
 import json
@@ -15,6 +16,10 @@ from PIL import Image
 API_BASE_URL = "http://localhost:8000"
 TEST_IMAGE_PATH = "/tmp/test_product.jpg"
 
+# Range parsing is a pure function: checked without a running backend
+sys.path.insert(0, str(Path(__file__).parent / "back"))
+from app.http_cache import RangeNotSatisfiable, parse_range
+
 async def create_test_image():
     """Create a simple test image."""
     img = Image.new('RGB', (400, 500), color='red')
@@ -95,14 +100,25 @@ async def test_upload_and_download():
             print(f"  ❌ Validation failed: {e}")
             return False
         
-        # Step 3: Test with product creation
-        print("\n3️⃣  Testing product creation with image...")
+        # Step 3: Range requests
+        print("\n3️⃣  Testing Range requests...")
+        try:
+            assert await check_range_requests(client, image_url, image_data)
+        except httpx.RequestError as e:
+            print(f"  ❌ Range request failed: {e}")
+            return False
+        except AssertionError as e:
+            print(f"  ❌ Validation failed: {e}")
+            return False
+
+        # Step 4: Test with product creation
+        print("\n4️⃣  Testing product creation with image...")
         
         # First need to test endpoint (may require auth in future)
         print("  (Skipping product creation test - requires auth setup)")
         
-        # Step 4: Verify no direct MinIO URLs
-        print("\n4️⃣  Verifying security (no direct MinIO exposure)...")
+        # Step 5: Verify no direct MinIO URLs
+        print("\n5️⃣  Verifying security (no direct MinIO exposure)...")
         print(f"  ✓ Upload response contains only proxy path: {image_url}")
         print(f"    NOT direct MinIO URL (no 'minio:9000' or ':9000')")
         assert 'minio:9000' not in image_url, "❌ Direct MinIO URL exposed!"
@@ -111,12 +127,92 @@ async def test_upload_and_download():
         
     return True
 
+def test_parse_range():
+    """parse_range() edge cases (no backend or MinIO needed)."""
+    size = 1000
+    assert parse_range(None, size) is None
+    assert parse_range("bytes=0-99", size) == (0, 99)
+    assert parse_range("bytes=100-", size) == (100, 999)             # open-ended
+    assert parse_range("bytes=-100", size) == (900, 999)             # suffix
+    assert parse_range("bytes=-5000", size) == (0, 999)              # suffix longer than the file
+    assert parse_range("bytes=990-5000", size) == (990, 999)         # end clamped
+    assert parse_range("bytes=999-999", size) == (999, 999)          # last byte
+
+    # Ignored (the whole file is sent): reversed, multi-range, other unit, bad syntax
+    for header in ("bytes=50-10", "bytes=0-9,20-29", "items=0-9", "bytes=abc", "bytes=-", "bytes=1-2-3"):
+        assert parse_range(header, size) is None, header
+
+    # Unsatisfiable: start at or past the end, empty suffix, empty file
+    for header, object_size in (
+        ("bytes=1000-", size),
+        ("bytes=1000-1010", size),
+        ("bytes=-0", size),
+        ("bytes=0-", 0),
+        ("bytes=-10", 0),
+    ):
+        try:
+            parse_range(header, object_size)
+        except RangeNotSatisfiable:
+            continue
+        raise AssertionError(f"❌ {header} (size {object_size}): expected RangeNotSatisfiable")
+
+
+async def check_range_requests(client, image_url, image_data):
+    """Single byte ranges: bounded, open-ended, suffix and unsatisfiable."""
+    size = len(image_data)
+    url = f"{API_BASE_URL}{image_url}"
+
+    cases = [
+        ("bytes=0-99", 0, 99),                      # bounded
+        ("bytes=100-", 100, size - 1),              # open-ended
+        ("bytes=-100", size - 100, size - 1),       # suffix: last 100 bytes
+        (f"bytes=-{size * 2}", 0, size - 1),        # suffix longer than the file
+        (f"bytes=10-{size * 2}", 10, size - 1),     # end past the file is clamped
+    ]
+    for header, start, end in cases:
+        response = await client.get(url, headers={"Range": header})
+        assert response.status_code == 206, \
+            f"❌ {header}: expected 206, got {response.status_code}"
+        assert response.headers.get('content-range') == f"bytes {start}-{end}/{size}", \
+            f"❌ {header}: wrong Content-Range {response.headers.get('content-range')}"
+        assert response.content == image_data[start:end + 1], f"❌ {header}: wrong bytes"
+        assert response.headers.get('content-length') == str(end - start + 1), \
+            f"❌ {header}: wrong Content-Length {response.headers.get('content-length')}"
+        print(f"  ✓ {header} → 206, {len(response.content)} bytes")
+
+    for header in (f"bytes={size}-", f"bytes={size + 10}-{size + 20}", "bytes=-0"):
+        response = await client.get(url, headers={"Range": header})
+        assert response.status_code == 416, \
+            f"❌ {header}: expected 416, got {response.status_code}"
+        assert response.headers.get('content-range') == f"bytes */{size}", \
+            f"❌ {header}: wrong Content-Range {response.headers.get('content-range')}"
+        print(f"  ✓ {header} → 416 Range Not Satisfiable")
+
+    # Several ranges or a malformed header: the whole file with 200
+    for header in ("bytes=0-9,20-29", "bytes=50-10", "items=0-9"):
+        response = await client.get(url, headers={"Range": header})
+        assert response.status_code == 200 and response.content == image_data, \
+            f"❌ {header}: expected full 200 response, got {response.status_code}"
+        print(f"  ✓ {header} → 200, full file")
+
+    assert response.headers.get('accept-ranges') == 'bytes', "❌ Accept-Ranges: bytes missing"
+    return True
+
+
 async def main():
     """Run all tests."""
     print("=" * 60)
     print("IMAGE PROXY ARCHITECTURE TEST")
     print("=" * 60)
     
+    print("\n0️⃣  Checking Range header parsing...")
+    try:
+        test_parse_range()
+        print("  ✓ parse_range edge cases pass")
+    except AssertionError as e:
+        print(f"  ❌ {e}")
+        return False
+
     # Create test image
     try:
         await create_test_image()
@@ -139,6 +235,7 @@ async def main():
         print("  • Images upload to MinIO")
         print("  • Backend returns proxy paths (/media/download/...)")
         print("  • Frontend can download via proxy")
+        print("  • Range requests return 206/416 with correct bytes")
         print("  • Direct MinIO URLs are NOT exposed")
         print("\nNo more net::ERR_NAME_NOT_RESOLVED errors! 🎉")
     else:
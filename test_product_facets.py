@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test /products/facets caching on the ILIKE search path
+
+Runs the products router against a temporary SQLite database (no services
+needed). On SQLite search is ILIKE, which is case-sensitive for Cyrillic,
+so queries differing only in case must not share a facets cache entry.
+
+Usage:
+    python -m pytest -q test_product_facets.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Separate temporary database, never the working one
+_db_file = tempfile.NamedTemporaryFile(suffix=".sqlite", delete=False)
+os.environ["DATABASE_URL"] = f"sqlite:///{_db_file.name}"
+sys.path.insert(0, str(Path(__file__).parent / "back"))
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import Base, engine
+from app.routers import products, users
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.include_router(products.router, prefix="/products")
+    app.include_router(users.router, prefix="/users")
+    with TestClient(app) as client:
+        yield client
+    os.unlink(_db_file.name)
+
+
+def test_facets_search_case_is_part_of_cache_key(client):
+    seller = client.post("/users/", json={"telegram_id": "facets-seller", "username": "facets"}).json()
+    for title, size in (("куртка джинсовая", "S"), ("Куртка кожаная", "M")):
+        response = client.post(
+            "/products/", params={"seller_id": seller["id"]},
+            json={"title": title, "price": 1000, "size": size},
+        )
+        assert response.status_code == 200, response.text
+    products.facets_cache.clear()
+
+    lower = client.get("/products/facets", params={"search": "куртка"}).json()
+    upper = client.get("/products/facets", params={"search": "Куртка"}).json()
+
+    assert lower["size"] == [{"value": "S", "count": 1}]
+    assert upper["size"] == [{"value": "M", "count": 1}]
+
+    # Extra whitespace changes the ILIKE pattern too
+    spaced = client.get("/products/facets", params={"search": "куртка  джинсовая"}).json()
+    assert spaced["size"] == []
@@ -115,8 +115,12 @@ export async function getProducts(filters?: {
     style?: string;
     gender?: string;
     condition?: string;
+    min_price?: number;
+    max_price?: number;
+    sort?: "newest" | "price_asc" | "price_desc";
     skip?: number;
     limit?: number;
+    fields?: (keyof Product)[];
 }): Promise<Product[]> {
     const params = new URLSearchParams();
     
@@ -129,14 +133,59 @@ export async function getProducts(filters?: {
         if (filters.style) params.append("style", filters.style);
         if (filters.gender) params.append("gender", filters.gender);
         if (filters.condition) params.append("condition", filters.condition);
+        if (filters.min_price !== undefined) params.append("min_price", String(filters.min_price));
+        if (filters.max_price !== undefined) params.append("max_price", String(filters.max_price));
+        if (filters.sort) params.append("sort", filters.sort);
         if (filters.skip !== undefined) params.append("skip", String(filters.skip));
         if (filters.limit !== undefined) params.append("limit", String(filters.limit));
+        if (filters.fields?.length) params.append("fields", filters.fields.join(","));
     }
 
     const endpoint = params.toString() ? `/products?${params.toString()}` : "/products";
     return fetchAPI(endpoint);
 }
 
+export interface ProductSuggestions {
+    titles: string[];
+    categories: Category[];
+}
+
+export async function suggestProducts(q: string, limit?: number): Promise<ProductSuggestions> {
+    const params = new URLSearchParams({ q });
+    if (limit !== undefined) params.append("limit", String(limit));
+    return fetchAPI(`/products/suggest?${params.toString()}`);
+}
+
+export interface FacetValue {
+    value: string;
+    count: number;
+}
+
+export type ProductFacets = Record<
+    "size" | "color" | "style" | "gender" | "condition" | "section" | "category_id",
+    FacetValue[]
+>;
+
+export async function getProductFacets(filters?: {
+    search?: string;
+    section?: string;
+    category_id?: number;
+    size?: string;
+    color?: string;
+    style?: string;
+    gender?: string;
+    condition?: string;
+}): Promise<ProductFacets> {
+    const params = new URLSearchParams();
+    if (filters) {
+        for (const [key, value] of Object.entries(filters)) {
+            if (value) params.append(key, String(value));
+        }
+    }
+    const query = params.toString();
+    return fetchAPI(query ? `/products/facets?${query}` : "/products/facets");
+}
+
 export async function getProduct(productId: string): Promise<Product> {
     return fetchAPI(`/products/${productId}`);
 }
@@ -213,6 +262,8 @@ export async function checkHealth() {
 export default {
     getProducts,
     getProduct,
+    suggestProducts,
+    getProductFacets,
     createProduct,
     getCategories,
     getCategory,
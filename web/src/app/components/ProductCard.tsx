@@ -29,7 +29,9 @@ export function ProductCard({ product }: ProductCardProps) {
     // If it's a relative path starting with /, prepend API base URL
     if (product.image_url.startsWith("/")) {
       const apiUrl = import.meta.env.VITE_API_URL || "http://localhost:8000";
-      return `${apiUrl}${product.image_url}`;
+      // Card-sized derivative instead of the full photo
+      const size = product.image_url.startsWith("/media/download/") ? "?size=card" : "";
+      return `${apiUrl}${product.image_url}${size}`;
     }
     // If it's already a full URL, use as-is
     return product.image_url;